@@ -0,0 +1,10 @@
+import streamlit as st
+
+# Los informes como páginas de una sola app: comparten el proceso y, con él,
+# los datasets cargados por brfss.load_dataset() y salary.load_salary_dataset().
+pages = st.navigation([
+    st.Page("d1.py", title="Prevalencia de Deterioro Cognitivo", default=True),
+    st.Page("d2.py", title="Informe Nacional"),
+    st.Page("d3.py", title="Brecha Salarial de Género"),
+])
+pages.run()
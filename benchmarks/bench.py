@@ -0,0 +1,305 @@
+# Benchmarks sin interfaz de la carga y las agregaciones de los informes.
+#
+#   python -m benchmarks.bench                       # 1x, 10x, 100x y 1000x
+#   python -m benchmarks.bench --only salary.        # solo el informe de brecha salarial
+#   python -m benchmarks.bench --scales 1 10 --output results.json
+#   python -m benchmarks.bench --compare results.json --threshold 0.2
+#
+# Cada caso registra tiempo (mejor de --repeat), filas/s y crecimiento del RSS
+# del proceso durante el caso (pico menos RSS al empezar). El JSON
+# resultante se puede comparar entre commits con --compare.
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from brfss.analytics import build_cube, cube_summary, gender_gap, geo, ranking, trend
+from brfss.data import (
+    CACHE_DIR,
+    CSV_PATH,
+    build_brfss,
+    build_filter_index,
+    frame_memory_mb,
+    parse_geolocation,
+    read_brfss_csv,
+    select_rows,
+)
+from brfss.metrics import RSSSampler
+from brfss.parallel import load_parallel
+from brfss.streaming import stream_cube, stream_rows
+from salary.analytics import GAP_DIMENSIONS, bootstrap_gap, gap_report, gap_table
+from salary.data import SALARY_CSV_PATH, read_salary_csv
+
+BENCH_DIR = os.path.join(CACHE_DIR, "bench")
+DEFAULT_SCALES = [1, 10, 100, 1000]
+# Bloques pequeños para que el cargador paralelo reparta también los CSV escalados medianos;
+# las copias escaladas repiten filas, así que ahí no se deduplica
+PARALLEL_CHUNK_BYTES = 16 << 20
+
+
+def scaled_csv(factor, source=CSV_PATH, prefix="brfss"):
+    # Copia del CSV con las filas de datos repetidas `factor` veces (se reutiliza si ya existe)
+    if factor == 1:
+        return source
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"{prefix}_x{factor}.csv")
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        return path
+
+    with open(source, "rb") as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith(b"\n"):
+        body += b"\n"
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for _ in range(factor):
+            f.write(body)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ---------------- RUTA ORIGINAL (REFERENCIA) ----------------
+# Reproduce la carga previa al esquema explícito para medir la mejora.
+
+def legacy_extract_coords(point_str):
+    try:
+        if pd.isna(point_str) or str(point_str).strip() == "":
+            return None, None
+        coords = re.findall(r"[-+]?\d*\.\d+|\d+", str(point_str))
+        if len(coords) >= 2:
+            return float(coords[1]), float(coords[0])
+    except Exception:
+        return None, None
+    return None, None
+
+
+def legacy_load(file_path):
+    df = pd.read_csv(file_path, sep=None, engine='python', on_bad_lines='skip')
+    for col in ['Data_Value', 'Low_Confidence_Limit', 'High_Confidence_Limit']:
+        if col in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype(str).str.replace(',', '.')
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'Geolocation' in df.columns:
+        coords = df['Geolocation'].apply(legacy_extract_coords)
+        df[['lat', 'lon']] = pd.DataFrame(coords.tolist(), index=df.index)
+    return df
+
+
+# ---------------- CASOS ----------------
+
+def build_cases(file_path, legacy):
+    # Devuelve [(nombre, preparación, función)]; la preparación no se cronometra
+    state = {}
+
+    def loaded():
+        if 'df' not in state:
+            state['df'], _ = build_brfss(file_path)
+            state['col_tema'] = 'Topic' if 'Topic' in state['df'].columns else 'Question'
+        return state['df']
+
+    def raw_geolocation():
+        if 'geo' not in state:
+            state['geo'] = read_brfss_csv(file_path)[0]['Geolocation']
+        return state['geo']
+
+    def selection():
+        df = loaded()
+        if 'tema' not in state:
+            col_tema = state['col_tema']
+            state['filters'] = build_filter_index(df, col_tema)
+            state['cube'] = build_filter_index(build_cube(df, col_tema), col_tema)
+            state['tema'] = state['filters']['temas'][0]
+            state['edad'] = state['filters']['edades'][0]
+        return state
+
+    def raw_mapa():
+        s = selection()
+        df = loaded()
+        return df[(df[s['col_tema']] == s['tema']) & (df['Stratification1'] == s['edad'])]
+
+    def cube_parts():
+        s = selection()
+        return select_rows(s['cube'], s['tema']), select_rows(s['cube'], s['tema'], s['edad'])
+
+    cases = [
+        ("load.read_csv", None, lambda _: read_brfss_csv(file_path)),
+        ("load.build_brfss", None, lambda _: build_brfss(file_path)),
+        ("load.parallel", None, lambda _: load_parallel(file_path, chunk_bytes=PARALLEL_CHUNK_BYTES, dedupe=False)),
+        ("load.streaming_cube", None, lambda _: stream_cube(file_path)),
+        ("load.parse_geolocation", raw_geolocation, parse_geolocation),
+        # Bloque sin ningún punto: pyarrow lo lee con categorías float64 vacías
+        ("load.parse_geolocation_blank",
+         lambda: pd.Series(np.nan, index=raw_geolocation().index).astype('category'), parse_geolocation),
+        ("load.legacy_extract_coords", lambda: raw_geolocation().astype(object),
+         lambda geo_col: geo_col.apply(legacy_extract_coords)),
+        ("filter.mask_scan", selection, lambda s: loaded()[
+            (loaded()[s['col_tema']] == s['tema']) & (loaded()['Stratification1'] == s['edad'])]),
+        ("filter.build_index", selection, lambda s: build_filter_index(loaded(), s['col_tema'])),
+        ("filter.select_rows", selection, lambda s: select_rows(s['filters'], s['tema'], s['edad'])),
+        ("filter.stream_rows", selection, lambda s: stream_rows(file_path, s['col_tema'], s['tema'], s['edad'])),
+        ("cube.build", selection, lambda s: build_cube(loaded(), s['col_tema'])),
+        ("tab.summary", cube_parts, lambda parts: cube_summary(parts[1])),
+        ("tab.trend", cube_parts, lambda parts: trend(parts[1])),
+        ("tab.ranking", cube_parts, lambda parts: ranking(parts[1])),
+        ("tab.gender_gap", cube_parts, lambda parts: gender_gap(parts[0])),
+        ("tab.geo", cube_parts, lambda parts: geo(parts[1])),
+        ("tab.raw_groupby_trend", raw_mapa,
+         lambda m: m.groupby("YearStart", observed=True)["Data_Value"].mean()),
+        ("tab.raw_groupby_geo", raw_mapa,
+         lambda m: m.groupby(['LocationAbbr', 'LocationDesc'], observed=True)['Data_Value'].mean()),
+    ]
+    if legacy:
+        cases.insert(0, ("load.legacy", None, lambda _: legacy_load(file_path)))
+    return cases
+
+
+def build_salary_cases(file_path, legacy):
+    # Casos del informe de brecha salarial; no tiene ruta original con la que comparar
+    state = {}
+
+    def loaded():
+        if 'df' not in state:
+            state['df'], _ = read_salary_csv(file_path)
+        return state['df']
+
+    return [
+        ("salary.read_csv", None, lambda _: read_salary_csv(file_path)),
+        ("salary.gap_table", loaded, lambda df: gap_table(df, 'department')),
+        ("salary.bootstrap", loaded, lambda df: bootstrap_gap(df, 'department', n_boot=1000)),
+        ("salary.gap_report_all", loaded,
+         lambda df: [gap_report(df, by, n_boot=1000) for by in [None] + list(GAP_DIMENSIONS)]),
+    ]
+
+
+# Cada suite: (prefijo de las copias escaladas, CSV de origen, constructor de casos)
+SUITES = [
+    ("brfss", CSV_PATH, build_cases),
+    ("salary", SALARY_CSV_PATH, build_salary_cases),
+]
+
+
+def time_case(prepare, func, repeat):
+    arg = prepare() if prepare is not None else None
+    timings = []
+    with RSSSampler() as rss:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = func(arg)
+            timings.append(time.perf_counter() - t0)
+
+    # Para las cargas se registra también la memoria del frame resultante
+    if isinstance(result, tuple):
+        result = result[0]
+    frame_mb = frame_memory_mb(result) if isinstance(result, pd.DataFrame) else None
+    # Crecimiento del RSS durante el caso, no el RSS absoluto del proceso
+    return min(timings), float(np.median(timings)), rss.peak_delta, frame_mb
+
+
+def run(scales, repeat=3, legacy_max_rows=600_000, only=None):
+    results = []
+    for suite, source, suite_cases in SUITES:
+        base_rows = sum(1 for _ in open(source, "rb")) - 1
+        for factor in scales:
+            rows = base_rows * factor
+            legacy = rows <= legacy_max_rows
+            selected = [name for name, _, _ in suite_cases(source, legacy)
+                        if not only or any(name.startswith(prefix) for prefix in only)]
+            if not selected:
+                continue
+
+            for name, prepare, func in suite_cases(scaled_csv(factor, source, suite), legacy):
+                if name not in selected:
+                    continue
+                best, median, rss_delta, frame_mb = time_case(prepare, func, repeat)
+                results.append({
+                    "case": name,
+                    "scale": factor,
+                    "rows": rows,
+                    "seconds": best,
+                    "median_seconds": median,
+                    "rows_per_second": rows / best if best > 0 else None,
+                    "rss_delta_mb": rss_delta / 1e6,
+                    "frame_mb": frame_mb,
+                })
+                print(f"{name:<30} x{factor:<5} {best * 1000:10.2f} ms  {rows / max(best, 1e-12):14,.0f} filas/s  "
+                      f"+{rss_delta / 1e6:8.1f} MB" + (f"  frame {frame_mb:8.1f} MB" if frame_mb is not None else ""), flush=True)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    # Imprime la relación con una ejecución previa; devuelve los casos que empeoraron
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["scale"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nComparación con {baseline_path} (umbral {threshold:.0%})")
+    for r in results:
+        old = baseline.get((r["case"], r["scale"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESIÓN"
+            regressions.append(r)
+        print(f"{r['case']:<30} x{r['scale']:<5} {old['seconds'] * 1000:10.2f} -> {r['seconds'] * 1000:10.2f} ms  "
+              f"x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de carga y agregación de los informes")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="prefijos de casos a ejecutar (p. ej. load. tab.)")
+    parser.add_argument("--legacy-max-rows", type=int, default=600_000,
+                        help="no ejecutar la carga original por encima de estas filas")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON de una ejecución previa")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="empeoramiento relativo que cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, repeat=args.repeat, legacy_max_rows=args.legacy_max_rows, only=args.only)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResultados en {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
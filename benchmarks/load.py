@@ -0,0 +1,265 @@
+# Prueba de carga sin interfaz de los informes: N sesiones simuladas con AppTest
+# en el mismo proceso, como las sirve `streamlit run` (un hilo por sesión sobre
+# el dataset y las cachés compartidas). Cada sesión cambia al azar de tema,
+# grupo etario y pestaña; se mide cada rerun.
+#
+#   python -m benchmarks.load                                # d1.py con 1, 4, 16 y 32 sesiones
+#   python -m benchmarks.load --page d2.py --sessions 8 --actions 50 --think 0.5
+#   python -m benchmarks.load --compare load_results.json --max-p95 1.0
+#
+# Cada número de sesiones se ejecuta en un proceso nuevo para que la memoria por
+# sesión no arrastre la de la ronda anterior. Se informa de la latencia p50/p95/p99
+# de los reruns, los reruns por segundo y el crecimiento de RSS por sesión; el JSON
+# tiene el formato de benchmarks.bench (seconds = p95) y se compara igual.
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from benchmarks.bench import compare, environment
+from brfss.data import ROOT_DIR
+from brfss.metrics import RSSSampler
+
+DEFAULT_SESSIONS = [1, 4, 16, 32]
+# shared_runtime() sustituye piezas internas de Streamlit; solo se ha comprobado
+# con estas versiones (mayor, menor), desde la primera incluida hasta la segunda excluida
+STREAMLIT_VERSIONS = ((1, 65), (1, 66))
+# Clave de session_state de las pestañas de cada página
+PAGES = {
+    "d1.py": "tabs_informe",
+    "d2.py": "tabs_informe",
+    "d3.py": "tabs_brecha",
+}
+
+
+def check_streamlit():
+    # Falla con un mensaje claro en vez de con errores internos si la versión instalada
+    # de Streamlit no es una de las que shared_runtime() sabe parchear
+    import streamlit
+
+    version = tuple(int(part) for part in re.findall(r"\d+", streamlit.__version__)[:2])
+    low, high = STREAMLIT_VERSIONS
+    if not low <= version < high:
+        raise RuntimeError(
+            f"benchmarks.load usa piezas internas de Streamlit y solo está probado con "
+            f"{low[0]}.{low[1]} <= streamlit < {high[0]}.{high[1]}; instalado {streamlit.__version__}. "
+            f"Revise shared_runtime() y actualice STREAMLIT_VERSIONS."
+        )
+
+
+@contextmanager
+def shared_runtime():
+    # AppTest instala un Runtime simulado global al empezar cada run y lo borra al
+    # terminar, así que con varias sesiones en paralelo la primera que termina deja
+    # sin runtime a las demás. Mientras dura la prueba, Runtime.instance()/exists()
+    # recurren al último runtime instalado, la opción global.appTest queda activa
+    # (cada run la restaura al terminar) y todas las sesiones comparten una
+    # ScriptCache (AppTest crea una por run y recompilar el script en varios hilos
+    # a la vez hace fallar ast.parse), como en un servidor con un único Runtime.
+    check_streamlit()
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import patch_config_options
+
+    original = Runtime.__dict__['instance'], Runtime.__dict__['exists']
+    get_bytecode = ScriptCache.__dict__['get_bytecode']
+    script_cache = ScriptCache()
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        if not last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last[0]
+
+    def exists(cls):
+        return cls._instance is not None or bool(last)
+
+    Runtime.instance, Runtime.exists = classmethod(instance), classmethod(exists)
+    ScriptCache.get_bytecode = lambda self, script_path: get_bytecode(script_cache, script_path)
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance, Runtime.exists = original
+        ScriptCache.get_bytecode = get_bytecode
+
+
+def new_session(page, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(os.path.join(ROOT_DIR, page), default_timeout=timeout)
+
+
+def random_action(at, tabs_key, rng):
+    # Cambia un selectbox de la barra lateral o la pestaña abierta
+    choices = list(at.sidebar.selectbox) + (["tabs"] if at.tabs else [])
+    target = rng.choice(choices)
+    if target == "tabs":
+        at.session_state[tabs_key] = rng.choice([tab.label for tab in at.tabs])
+        return "tabs"
+    target.select_index(rng.randrange(len(target.options)))
+    return target.label
+
+
+def timed_run(at, samples, errors):
+    t0 = time.perf_counter()
+    try:
+        at.run()
+        if at.exception:
+            errors.append(at.exception[0].value)
+    except Exception as exc:
+        errors.append(repr(exc))
+    samples.append(time.perf_counter() - t0)
+
+
+def percentiles(samples):
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(max(samples))}
+
+
+def run_level(page, sessions, actions, think=0.0, seed=0, timeout=120):
+    # Una ronda con `sessions` sesiones; se ejecuta en un proceso propio
+    tabs_key = PAGES.get(page)
+    # Los hilos de las sesiones no son hilos de script de Streamlit y cada acceso al
+    # contexto desde ellos avisa de que falta; es esperado y tapa la tabla de resultados.
+    # Se filtra el mensaje (cada run restablece el nivel de los loggers de Streamlit).
+    from streamlit.runtime.scriptrunner_utils import script_run_context
+
+    logging.getLogger(script_run_context.__name__).addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage()
+    )
+    with shared_runtime(), RSSSampler() as rss:
+        # Calentamiento: dataset, importaciones y cachés de proceso antes de la línea base
+        new_session(page, timeout).run()
+        baseline = rss._rss()
+
+        first, latencies, errors = [], [], []
+        ready = threading.Barrier(sessions + 1)
+        memory = {}
+
+        def session(index):
+            rng = random.Random(seed * 100_003 + index)
+            try:
+                at = new_session(page, timeout)
+                timed_run(at, first, errors)
+            except BaseException:
+                ready.abort()
+                raise
+            ready.wait()
+            for _ in range(actions):
+                if think:
+                    time.sleep(rng.uniform(0, think))
+                if at.sidebar.selectbox:
+                    random_action(at, tabs_key, rng)
+                timed_run(at, latencies, errors)
+
+        threads = [threading.Thread(target=session, args=(i,), daemon=True) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        # Con todas las sesiones abiertas y su primer rerun hecho, se mide la memoria
+        ready.wait()
+        t0 = time.perf_counter()
+        memory['open'] = rss._rss()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - t0
+
+    return {
+        'page': page,
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'wall_seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds > 0 else None,
+        'latency': percentiles(latencies),
+        'first_run': percentiles(first),
+        'mb_per_session': max(memory['open'] - baseline, 0) / sessions / 1e6,
+        'peak_rss_mb': rss.peak / 1e6,
+        'errors': len(errors),
+        'first_error': str(errors[0])[:200] if errors else None,
+    }
+
+
+def fmt(value, scale=1):
+    # Sin reruns medidos (p. ej. --actions 0) no hay percentiles ni rendimiento
+    return "-" if value is None else f"{value * scale:.1f}"
+
+
+def run(page, levels, actions, think=0.0, seed=0, timeout=120):
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'sesiones':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'reruns/s':>9} {'MB/sesión':>10} {'errores':>8}")
+    for sessions in levels:
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            level = pool.submit(run_level, page, sessions, actions, think, seed, timeout).result()
+        lat = level['latency']
+        print(f"{sessions:>8} {level['reruns']:>7} {fmt(lat['p50'], 1000):>9} {fmt(lat['p95'], 1000):>9} "
+              f"{fmt(lat['p99'], 1000):>9} {fmt(level['throughput']):>9} {level['mb_per_session']:>10.2f} "
+              f"{level['errors']:>8}", flush=True)
+        if level['first_error']:
+            print(f"         primer error: {level['first_error']}")
+        # Formato de benchmarks.bench para poder usar --compare: el caso es la página y
+        # la escala el número de sesiones
+        results.append({
+            'case': f"session.{os.path.splitext(page)[0]}",
+            'scale': sessions,
+            'seconds': lat['p95'],
+            **level,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones simuladas de los informes")
+    parser.add_argument("--page", default="d1.py", choices=sorted(PAGES))
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS)
+    parser.add_argument("--actions", type=int, default=20, help="reruns medidos por sesión")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="pausa máxima (s) entre acciones de una sesión; 0 satura el proceso")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="tiempo máximo de un rerun (s)")
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--compare", help="JSON de una ejecución previa")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="empeoramiento relativo del p95 que cuenta como regresión")
+    parser.add_argument("--max-p95", type=float,
+                        help="p95 máximo admitido (s); por encima la prueba falla (límite de capacidad)")
+    args = parser.parse_args(argv)
+    check_streamlit()
+
+    results = run(args.page, args.sessions, args.actions, args.think, args.seed, args.timeout)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResultados en {args.output}")
+
+    failed = [r for r in results if r['errors']]
+    measured = [r for r in results if r['seconds'] is not None]
+    if args.max_p95 is not None:
+        over = [r for r in measured if r['seconds'] > args.max_p95]
+        for r in over:
+            print(f"{r['sessions']} sesiones: p95 {r['seconds'] * 1000:.1f} ms > {args.max_p95 * 1000:.0f} ms")
+        failed += over
+    if args.compare:
+        failed += compare(measured, args.compare, args.threshold)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
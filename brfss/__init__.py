@@ -0,0 +1,27 @@
+from brfss.analytics import (
+    build_cube,
+    cube_mean,
+    cube_summary,
+    gender_gap,
+    geo,
+    ranking,
+    trend,
+)
+from brfss.cache import LRUCache
+from brfss.data import (
+    CSV_PATH,
+    active_dataset,
+    build_dataset,
+    clear_dataset_cache,
+    load_dataset,
+    select_rows,
+)
+from brfss.incremental import ingest_release
+from brfss.views import (
+    FIGURE_CACHE,
+    SELECTION_CACHE,
+    cached_figure,
+    selection_frame,
+    selection_views,
+    trim_geo,
+)
@@ -0,0 +1,110 @@
+# Agregaciones puras sobre el cubo de Data_Value (sin dependencia de Streamlit).
+
+import numpy as np
+import pandas as pd
+
+CUBE_KEYS = ['Stratification1', 'Stratification2', 'LocationAbbr', 'LocationDesc', 'YearStart']
+GENDERS = ['Female', 'Male']
+CUBE_FIELDS = ['value_sum', 'value_count', 'rows', 'weight_sum', 'weighted_sum']
+Z_95 = 1.959963984540054
+
+
+def build_cube(df, col_tema):
+    # Cubo de suma y conteo de Data_Value por tema, estratos, estado y año.
+    # Se guardan suma y conteo (no la media) para que cualquier agregación posterior sea exacta.
+    # Con los límites de confianza se añaden además las sumas de la media ponderada
+    # por inverso de la varianza (weight_sum = Σw, weighted_sum = Σw·x), también aditivas.
+    keys = [col_tema] + [k for k in CUBE_KEYS if k in df.columns]
+    value = df['Data_Value'].to_numpy('float64', na_value=np.nan)
+    weight = inverse_variance_weights(df, value)
+    cube = (
+        df.assign(_weight=weight, _weighted=weight * np.nan_to_num(value))
+        .groupby(keys, observed=True, dropna=False)
+        .agg(
+            value_sum=('Data_Value', 'sum'),
+            value_count=('Data_Value', 'count'),
+            rows=('Data_Value', 'size'),
+            weight_sum=('_weight', 'sum'),
+            weighted_sum=('_weighted', 'sum'),
+        )
+        .reset_index()
+    )
+    cube['value_sum'] = cube['value_sum'].astype('float64')
+    return cube
+
+
+def inverse_variance_weights(df, value):
+    # w = 1 / SE², con SE = ancho del IC al 95 % / (2 · 1,96). Las filas sin valor,
+    # sin IC o con ancho nulo reciben peso 0 y no cuentan en la media ponderada.
+    if not {'Low_Confidence_Limit', 'High_Confidence_Limit'} <= set(df.columns):
+        return np.zeros(len(df))
+    low = df['Low_Confidence_Limit'].to_numpy('float64', na_value=np.nan)
+    high = df['High_Confidence_Limit'].to_numpy('float64', na_value=np.nan)
+    se = (high - low) / (2 * Z_95)
+    valid = (se > 0) & ~np.isnan(value)
+    weight = np.zeros(len(df))
+    np.divide(1.0, se * se, out=weight, where=valid)
+    return weight
+
+
+def cube_mean(cube, by):
+    # Media de Data_Value por `by` calculada desde el cubo (NaN si el grupo no tiene valores)
+    grouped = cube.groupby(by, observed=True)[['value_sum', 'value_count']].sum()
+    data_value = grouped['value_sum'] / grouped['value_count'].where(grouped['value_count'] > 0)
+    return data_value.rename('Data_Value').reset_index()
+
+
+def cube_weighted_mean(cube, by):
+    # Media ponderada por inverso de la varianza e IC agrupado por `by`, en una sola
+    # pasada vectorizada sobre las sumas del cubo: x̄ = Σw·x / Σw, SE = 1 / √Σw.
+    # Los grupos sin IC usable conservan la media simple y quedan sin intervalo.
+    grouped = cube.groupby(by, observed=True)[CUBE_FIELDS].sum()
+    sums = grouped.to_numpy('float64')
+    value_sum, value_count, _, weight_sum, weighted_sum = sums.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plain = np.where(value_count > 0, value_sum / value_count, np.nan)
+        weighted = weighted_sum / weight_sum
+        half_width = Z_95 / np.sqrt(weight_sum)
+    has_weight = weight_sum > 0
+
+    result = pd.DataFrame(index=grouped.index)
+    result['Data_Value'] = np.where(has_weight, weighted, plain)
+    result['Low_Confidence_Limit'] = np.where(has_weight, weighted - half_width, np.nan)
+    result['High_Confidence_Limit'] = np.where(has_weight, weighted + half_width, np.nan)
+    result['Unweighted_Value'] = plain
+    return result.reset_index()
+
+
+def cube_summary(cube):
+    # Indicadores de cabecera: prevalencia media, registros y estados del corte
+    count = cube['value_count'].sum()
+    avg_val = cube['value_sum'].sum() / count if count else np.nan
+    return avg_val, int(cube['rows'].sum()), cube.loc[cube['rows'] > 0, 'LocationAbbr'].nunique()
+
+
+def trend(cube_mapa):
+    # Tendencia temporal de la prevalencia (media ponderada e IC agrupado)
+    return cube_weighted_mean(cube_mapa, "YearStart").sort_values("YearStart")
+
+
+def ranking(cube_mapa):
+    # Estados ordenados de mayor a menor prevalencia
+    return (
+        cube_weighted_mean(cube_mapa, 'LocationDesc')
+        .sort_values('Data_Value', ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def gender_gap(cube_tema):
+    # Prevalencia por grupo etario y sexo
+    return cube_mean(
+        cube_tema[cube_tema['Stratification2'].isin(GENDERS)],
+        ['Stratification1', 'Stratification2']
+    )
+
+
+def geo(cube_mapa):
+    # Prevalencia media ponderada por estado para el mapa
+    return cube_weighted_mean(cube_mapa, ['LocationAbbr', 'LocationDesc'])
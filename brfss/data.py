@@ -0,0 +1,488 @@
+# Carga, limpieza y caché del dataset BRFSS compartidos por los informes.
+
+import datetime
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from brfss.analytics import build_cube
+from brfss.metrics import RSSSampler
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT_DIR, "Alzheimer's_Disease_and_Healthy_Aging_Data_20260221.csv")
+
+# Esquema explícito del CSV del BRFSS: separador fijo y solo las columnas que
+# lee el informe, con tipos compactos desde el parser.
+CSV_SEP = ";"
+CSV_SCHEMA = {
+    'RowId': 'category',
+    'YearStart': 'Int16',
+    'LocationAbbr': 'category',
+    'LocationDesc': 'category',
+    'Topic': 'category',
+    'Question': 'category',
+    'Data_Value': 'str',
+    'Low_Confidence_Limit': 'float32',
+    'High_Confidence_Limit': 'float32',
+    'StratificationCategory1': 'category',
+    'Stratification1': 'category',
+    'StratificationCategory2': 'category',
+    'Stratification2': 'category',
+    'Geolocation': 'category',
+}
+# El CSV mezcla coma decimal (Data_Value) y punto (límites de confianza), así que
+# la opción `decimal` global del lector no sirve: lo que no se lee como número en
+# el parser se convierte después en una sola pasada con parse_decimal().
+NUMERIC_COLUMNS = ['Data_Value', 'Low_Confidence_Limit', 'High_Confidence_Limit']
+DECIMAL_PATTERN = r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+POINT_PATTERN = re.compile(r"POINT\s*\(\s*([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)\s*\)")
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+PARSER_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+# Los extractos del CDC llevan la fecha en el nombre; el dataset activo es el más reciente
+DATA_DIR = os.environ.get("BRFSS_DATA_DIR", ROOT_DIR)
+DATED_CSV_PATTERN = re.compile(r"^Alzheimer's_Disease_and_Healthy_Aging_Data_(\d{8})\.csv$")
+PARALLEL_MIN_BYTES = int(os.environ.get("BRFSS_PARALLEL_MIN_BYTES", 256 << 20))
+# Modo streaming (brfss.streaming): forzado con BRFSS_STREAMING=1 o automático
+# para CSV a partir de BRFSS_STREAMING_MIN_BYTES; solo deja el cubo en memoria.
+STREAMING = os.environ.get("BRFSS_STREAMING", "0") == "1"
+STREAMING_MIN_BYTES = int(os.environ.get("BRFSS_STREAMING_MIN_BYTES", 4 << 30))
+
+# Modo de memoria compacta (por defecto activo): categóricas para el texto de
+# baja cardinalidad, numéricos reducidos y fuera las columnas que ya no se leen.
+COMPACT_MEMORY = os.environ.get("BRFSS_COMPACT", "1") != "0"
+COMPACT_DROP = ['Geolocation']
+CATEGORY_MAX_RATIO = 0.5
+
+SCHEMA_TAG = hashlib.blake2b(
+    json.dumps([CSV_SCHEMA, COMPACT_MEMORY, COMPACT_DROP], sort_keys=True).encode(), digest_size=4
+).hexdigest()
+
+# RowId no es único en los extractos del CDC (no codifica el valor de los
+# estratos), así que la clave primaria de una fila lo combina con ambos estratos.
+ROW_KEY = ['RowId', 'Stratification1', 'Stratification2']
+
+_DATASETS = {}
+_DATASETS_LOCK = threading.Lock()
+_ACTIVE = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+def parse_geolocation(geo):
+    # Convierte 'POINT (lon lat)' en columnas lat/lon sin recorrer las filas en Python:
+    # el patrón se aplica una sola vez por punto distinto y se expande con los códigos.
+    geo = geo.astype('category')
+    # Con pyarrow, un fichero o bloque sin ningún punto deja categorías float64 vacías
+    points = geo.cat.categories.astype('str').to_series(index=range(len(geo.cat.categories)))
+    parts = points.str.extract(POINT_PATTERN)
+    blank = points.str.strip().eq("").to_numpy()
+
+    # Se añade un NaN al final para que el código -1 (valor vacío) caiga en él
+    lon_cat = np.append(pd.to_numeric(parts[0], errors='coerce').to_numpy('float64'), np.nan)
+    lat_cat = np.append(pd.to_numeric(parts[1], errors='coerce').to_numpy('float64'), np.nan)
+    codes = geo.cat.codes.to_numpy()
+
+    coords = pd.DataFrame({'lat': lat_cat[codes], 'lon': lon_cat[codes]}, index=geo.index)
+    malformed_cat = np.append(np.isnan(lat_cat[:-1]) & ~blank, False)
+    malformed = int(malformed_cat[codes].sum())
+    return coords, malformed
+
+
+def parse_decimal(series, dtype='float32'):
+    # Texto con coma o punto decimal a float en una sola pasada vectorizada (Arrow
+    # si está disponible). Devuelve la serie y cuántos valores no vacíos quedaron en NaN.
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(dtype), 0
+
+    missing = int(series.isna().sum())
+    if HAS_PYARROW:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        text = pa.array(series, type=pa.string(), from_pandas=True)
+        text = pc.utf8_trim_whitespace(pc.replace_substring(text, ',', '.'))
+        valid = pc.match_substring_regex(text, DECIMAL_PATTERN)
+        values = pc.cast(pc.if_else(valid, text, None), pa.from_numpy_dtype(np.dtype(dtype)))
+        result = pd.Series(values.to_numpy(zero_copy_only=False), index=series.index, dtype=dtype)
+    else:
+        text = series.str.replace(',', '.', regex=False)
+        result = pd.to_numeric(text, errors='coerce').astype(dtype)
+
+    return result, int(result.isna().sum()) - missing
+
+
+def read_brfss_csv(file_path, engine=PARSER_ENGINE):
+    # Devuelve el DataFrame crudo y las métricas de la lectura (tiempo y pico de memoria)
+    # `file_path` también puede ser un buffer en memoria (bloques del cargador paralelo)
+    rewind = getattr(file_path, 'seek', lambda _: None)
+    header = pd.read_csv(file_path, sep=CSV_SEP, nrows=0).columns
+    usecols = [c for c in header if c in CSV_SCHEMA]
+    dtype = {c: CSV_SCHEMA[c] for c in usecols}
+
+    read_options = dict(sep=CSV_SEP, engine=engine, usecols=usecols, on_bad_lines='skip')
+
+    with RSSSampler() as rss:
+        t0 = time.perf_counter()
+        try:
+            rewind(0)
+            df = pd.read_csv(file_path, dtype=dtype, **read_options)
+        except ValueError:
+            # Algún límite de confianza no se pudo leer como número (p. ej. coma
+            # decimal): esas columnas se leen como texto y las convierte parse_decimal().
+            dtype.update({c: 'str' for c in NUMERIC_COLUMNS if c in dtype})
+            rewind(0)
+            df = pd.read_csv(file_path, dtype=dtype, **read_options)
+        seconds = time.perf_counter() - t0
+
+    stats = {
+        "engine": engine,
+        "rows": len(df),
+        "seconds": seconds,
+        "peak_mb": rss.peak_delta / 1e6,
+    }
+    return df, stats
+
+
+def build_brfss(file_path):
+    # Lectura + limpieza completa: conversión numérica y coordenadas
+    df, stats = read_brfss_csv(file_path)
+    return clean_brfss(df, stats)
+
+
+def clean_brfss(df, stats):
+    stats['coerced'] = {}
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col], stats['coerced'][col] = parse_decimal(df[col])
+
+    if 'Geolocation' in df.columns:
+        coords, stats['geo_malformed'] = parse_geolocation(df['Geolocation'])
+        df[['lat', 'lon']] = coords
+
+    if COMPACT_MEMORY:
+        df, stats['memory'] = compact_frame(df)
+
+    return df, stats
+
+
+def align_categories(*frames):
+    # Unifica las categorías de las columnas categóricas para poder comparar y concatenar.
+    # La unión se ordena, como las categorías que crea el lector, para que el orden de
+    # grupos y de vistas no dependa de cómo se partió o combinó el frame.
+    frames = list(frames)
+    for col in frames[0].columns:
+        if not any(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f.columns):
+            continue
+        frames = [
+            f.assign(**{col: f[col].astype('category')}) if col in f.columns else f
+            for f in frames
+        ]
+        dtypes = [f[col].dtype for f in frames if col in f.columns]
+        categories = pd.Index(dtypes[0].categories)
+        for dtype in dtypes[1:]:
+            categories = categories.append(pd.Index(dtype.categories).difference(categories))
+        categories = categories.sort_values()
+        frames = [
+            f.assign(**{col: f[col].cat.set_categories(categories)}) if col in f.columns else f
+            for f in frames
+        ]
+    return frames
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True, index=False).sum() / 1e6
+
+
+def default_memory(series):
+    # Bytes de la columna tal como la deja read_csv sin esquema: texto con el tipo
+    # de cadena por defecto y números en 64 bits
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series) \
+            or series.dtype == object:
+        return int(series.astype('str').memory_usage(deep=True, index=False))
+    return 8 * len(series)
+
+
+def compact_frame(df, drop_columns=COMPACT_DROP):
+    # Reduce la huella en memoria del frame limpio y devuelve el informe: `raw_mb` es
+    # lo que ocuparían las mismas columnas leídas sin esquema, `before_mb` el frame con
+    # el esquema del lector y `after_mb` el frame compactado
+    raw = sum(default_memory(df[col]) for col in df.columns)
+    before = df.memory_usage(deep=True, index=False)
+    df = df.drop(columns=[c for c in drop_columns if c in df.columns])
+
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            df[col] = series.cat.remove_unused_categories()
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            if series.nunique() <= CATEGORY_MAX_RATIO * max(len(series), 1):
+                df[col] = series.astype('category')
+        elif pd.api.types.is_float_dtype(series) and series.dtype.itemsize > 4:
+            df[col] = series.astype('float32')
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+
+    after = df.memory_usage(deep=True, index=False)
+    report = {
+        "raw_mb": raw / 1e6,
+        "before_mb": before.sum() / 1e6,
+        "after_mb": after.sum() / 1e6,
+        "columns": {
+            col: {"before": int(before[col]), "after": int(after.get(col, 0))}
+            for col in before.index
+        },
+    }
+    return df, report
+
+
+def file_fingerprint(file_path):
+    # Tamaño, mtime y hash del contenido. Si tamaño y mtime coinciden con el
+    # manifiesto guardado se reutiliza su hash y no se vuelve a leer el archivo.
+    info = os.stat(file_path)
+    fingerprint = {"size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+    manifest = read_cache_manifest(file_path)
+    if manifest and all(manifest.get(k) == v for k, v in fingerprint.items()):
+        fingerprint["hash"] = manifest["hash"]
+        return fingerprint
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["hash"] = digest.hexdigest()
+    return fingerprint
+
+
+def cache_manifest_path(file_path):
+    return os.path.join(CACHE_DIR, os.path.basename(file_path) + ".json")
+
+
+def read_cache_manifest(file_path):
+    try:
+        with open(cache_manifest_path(file_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_path_for(source_hash, prefix="brfss", schema_tag=SCHEMA_TAG):
+    # El nombre incluye la huella del esquema: cambiar CSV_SCHEMA invalida las cachés viejas
+    return os.path.join(CACHE_DIR, f"{prefix}-{source_hash}-{schema_tag}.feather")
+
+
+def write_cached_frame(file_path, fingerprint, df, stats, cache_path):
+    # Escritura atómica del Feather y del manifiesto; borra la versión anterior de ese CSV
+    from pyarrow import feather
+
+    previous = read_cache_manifest(file_path)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = cache_path + f".{os.getpid()}.tmp"
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+
+    old_path = (previous or {}).get("cache_file")
+    if old_path and old_path != os.path.basename(cache_path):
+        old_path = os.path.join(CACHE_DIR, old_path)
+        if os.path.exists(old_path):
+            os.remove(old_path)
+
+    write_cache_manifest(file_path, fingerprint, stats, os.path.basename(cache_path))
+
+
+def write_cache_manifest(file_path, fingerprint, stats, cache_file=None):
+    # Huella del CSV (tamaño, mtime y hash) para que file_fingerprint() no vuelva a
+    # leerlo mientras no cambie; `cache_file` es su caché Feather, si la hay
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_manifest = cache_manifest_path(file_path) + f".{os.getpid()}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump({**fingerprint, "cache_file": cache_file, "stats": stats}, f)
+    os.replace(tmp_manifest, cache_manifest_path(file_path))
+
+
+def load_cached_frame(file_path, build, prefix="brfss", schema_tag=SCHEMA_TAG):
+    # Caché en disco (Arrow/Feather) del DataFrame ya limpio que devuelve
+    # build(file_path) -> (df, stats), con clave en el tamaño, mtime y hash del CSV
+    # y en la huella del esquema. Un CSV distinto invalida la caché y se reconstruye.
+    if not HAS_PYARROW:
+        return build(file_path)
+
+    from pyarrow import feather
+
+    fingerprint = file_fingerprint(file_path)
+    cache_path = cache_path_for(fingerprint["hash"], prefix=prefix, schema_tag=schema_tag)
+    manifest = read_cache_manifest(file_path)
+
+    if os.path.exists(cache_path) and manifest and manifest.get("hash") == fingerprint["hash"]:
+        t0 = time.perf_counter()
+        df = feather.read_table(cache_path, memory_map=True).to_pandas()
+        stats = dict(manifest.get("stats", {}))
+        stats.update({"engine": "caché feather", "rows": len(df), "seconds": time.perf_counter() - t0})
+        return df, stats
+
+    df, stats = build(file_path)
+    write_cached_frame(file_path, fingerprint, df, stats, cache_path)
+    return df, stats
+
+
+def load_cached_brfss(file_path):
+    return load_cached_frame(file_path, build_uncached_brfss)
+
+
+def build_uncached_brfss(file_path):
+    # Los CSV grandes se leen por bloques en varios procesos si hay más de un núcleo
+    if os.path.getsize(file_path) >= PARALLEL_MIN_BYTES and (os.cpu_count() or 1) > 1:
+        from brfss.parallel import load_parallel
+        return load_parallel(file_path)
+    return build_brfss(file_path)
+
+
+def build_filter_index(frame, col_tema):
+    # Ordena por (tema, grupo etario) para que cada selección del sidebar sea un
+    # rango contiguo de filas: filtrar pasa a ser un lookup en un dict y un slice sin copia.
+    frame = frame.sort_values([col_tema, 'Stratification1'], kind='stable')
+    sizes = frame.groupby([col_tema, 'Stratification1'], observed=True, sort=False, dropna=False).size()
+
+    ranges, tema_ranges = {}, {}
+    start = 0
+    for (tema, edad), n in sizes.items():
+        stop = start + int(n)
+        if not pd.isna(tema):
+            tema_ranges[tema] = (tema_ranges.get(tema, (start, stop))[0], stop)
+            if not pd.isna(edad):
+                ranges[(tema, edad)] = (start, stop)
+        start = stop
+
+    edades = []
+    if 'StratificationCategory1' in frame.columns:
+        edades = sorted(frame.loc[frame['StratificationCategory1'] == 'Age Group', 'Stratification1'].dropna().unique())
+    if not edades:
+        edades = sorted({edad for _, edad in ranges})
+
+    return {
+        'frame': frame,
+        'temas': sorted(tema_ranges),
+        'edades': edades,
+        'tema_ranges': tema_ranges,
+        'ranges': ranges,
+    }
+
+
+def select_rows(index, tema, edad=None):
+    # Vista de las filas de un tema y, si se indica, de un grupo etario
+    if edad is None:
+        start, stop = index['tema_ranges'].get(tema, (0, 0))
+    else:
+        start, stop = index['ranges'].get((tema, edad), (0, 0))
+    return index['frame'].iloc[start:stop]
+
+
+def use_streaming(file_path):
+    return STREAMING or os.path.getsize(file_path) >= STREAMING_MIN_BYTES
+
+
+def build_dataset(file_path=CSV_PATH):
+    # Frame limpio + índices de filtrado y cubo, listos para que los informes solo rendericen
+    if use_streaming(file_path):
+        from brfss.streaming import build_streaming_dataset
+        return build_streaming_dataset(file_path)
+    df, stats = load_cached_brfss(file_path)
+    dataset = dataset_from_frame(df, stats, file_fingerprint(file_path)['hash'])
+    dataset['source'] = os.path.abspath(file_path)
+    return dataset
+
+
+def dataset_from_frame(df, stats, version, cube=None):
+    col_tema = 'Topic' if 'Topic' in df.columns else 'Question'
+    if cube is None:
+        cube = build_cube(df, col_tema)
+    # El índice de filtrado guarda el frame ordenado; se usa ese mismo objeto como
+    # 'df' para no mantener dos copias de las filas por réplica.
+    filters = build_filter_index(df, col_tema)
+    return {
+        'version': version,
+        'df': filters['frame'],
+        'stats': stats,
+        'col_tema': col_tema,
+        'filters': filters,
+        'cube': build_filter_index(cube, col_tema),
+    }
+
+
+def release_date(file_path):
+    # Fecha de publicación del extracto: la del nombre (…_Data_AAAAMMDD.csv) o, si
+    # no la lleva, la de modificación del archivo
+    match = DATED_CSV_PATTERN.match(os.path.basename(file_path))
+    if match:
+        return datetime.datetime.strptime(match.group(1), "%Y%m%d").date()
+    return datetime.date.fromtimestamp(os.path.getmtime(file_path))
+
+
+def latest_csv(data_dir=DATA_DIR, default=CSV_PATH):
+    # CSV del BRFSS con la fecha más reciente en el nombre (…_Data_AAAAMMDD.csv)
+    try:
+        names = os.listdir(data_dir)
+    except OSError:
+        return default
+    dated = [(match.group(1), name) for name in names if (match := DATED_CSV_PATTERN.match(name))]
+    return os.path.join(data_dir, max(dated)[1]) if dated else default
+
+
+def load_dataset(file_path=None):
+    # Caché de proceso: todas las páginas y sesiones comparten el mismo dataset en memoria.
+    # Sin ruta se devuelve el dataset activo, que brfss.refresh puede reemplazar en caliente.
+    if file_path is None:
+        return active_dataset()
+    key = os.path.abspath(file_path)
+    dataset = _DATASETS.get(key)
+    if dataset is None:
+        with _DATASETS_LOCK:
+            dataset = _DATASETS.get(key)
+            if dataset is None:
+                dataset = _DATASETS[key] = build_dataset(file_path)
+    return dataset
+
+
+def active_dataset():
+    # El CSV fechado más reciente del directorio de datos, cargado la primera vez que se pide.
+    # Se construye fuera de _ACTIVE_LOCK (load_dataset toma _DATASETS_LOCK, que
+    # swap_active_dataset y clear_dataset_cache toman antes que _ACTIVE_LOCK) y se
+    # publica solo si nadie lo ha hecho mientras tanto.
+    global _ACTIVE
+    dataset = _ACTIVE
+    if dataset is None:
+        loaded = load_dataset(latest_csv())
+        with _ACTIVE_LOCK:
+            if _ACTIVE is None:
+                _ACTIVE = loaded
+            dataset = _ACTIVE
+    return dataset
+
+
+def swap_active_dataset(dataset):
+    # Reemplazo atómico de la referencia: los reruns en curso conservan el dataset que
+    # ya leyeron y los siguientes ven el nuevo. Devuelve el anterior.
+    global _ACTIVE
+    with _DATASETS_LOCK:
+        _DATASETS[dataset['source']] = dataset
+        with _ACTIVE_LOCK:
+            previous, _ACTIVE = _ACTIVE, dataset
+        if previous is not None and previous.get('source') != dataset['source']:
+            _DATASETS.pop(previous.get('source'), None)
+    return previous
+
+
+def clear_dataset_cache():
+    global _ACTIVE
+    with _DATASETS_LOCK:
+        _DATASETS.clear()
+        with _ACTIVE_LOCK:
+            _ACTIVE = None
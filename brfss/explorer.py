@@ -0,0 +1,99 @@
+# Consulta paginada y exportación por bloques de las filas crudas, resueltas en
+# pandas del lado del servidor: al navegador solo viaja la página visible.
+
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def text_filter_mask(frame, text):
+    # Coincidencia sin distinguir mayúsculas en cualquier columna de texto. Las
+    # categóricas se evalúan sobre sus categorías y se expanden con los códigos.
+    mask = pd.Series(False, index=frame.index)
+    for col in frame.columns:
+        series = frame[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            hits = series.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            codes = series.cat.codes.to_numpy()
+            mask |= (codes >= 0) & np.asarray(hits, dtype=bool)[codes]
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            mask |= series.astype(str).str.contains(text, case=False, regex=False).fillna(False)
+    return mask
+
+
+def query_rows(frame, columns=None, text=None, sort_by=None, ascending=True, page=1, page_size=50):
+    # Filtro de texto (sobre todas las columnas), proyección, orden y paginación.
+    # Devuelve la página, el total de filas filtradas y el número de páginas.
+    if text:
+        frame = frame[text_filter_mask(frame, text)]
+    if columns:
+        frame = frame[[c for c in columns if c in frame.columns]]
+
+    total = len(frame)
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+
+    if sort_by in frame.columns:
+        # Solo hace falta ordenar las posiciones, no materializar el frame completo ordenado
+        order = (
+            frame[sort_by].reset_index(drop=True)
+            .sort_values(ascending=ascending, kind='stable', na_position='last')
+            .index[start:start + page_size]
+        )
+        page_df = frame.iloc[order]
+    else:
+        page_df = frame.iloc[start:start + page_size]
+
+    return page_df, total, pages
+
+
+class _ChunkSink(io.RawIOBase):
+    # Destino de escritura que acumula bytes hasta que se vacía con drain()
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_export(frame, fmt="csv", chunk_rows=50_000):
+    # Genera el archivo de exportación por bloques de filas sin construirlo entero en memoria
+    if fmt == "csv":
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+        return
+
+    if fmt != "parquet":
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
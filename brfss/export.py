@@ -0,0 +1,153 @@
+# Exportación estática de todas las selecciones (tema × grupo etario): por cada
+# combinación se escriben indicadores, datos de los gráficos y figuras Plotly en
+# JSON, más un index.json con el catálogo y la plantilla Plotly común a todas las
+# figuras (que así no se repite en cada una). El resultado se sirve desde un CDN o
+# un visor ligero sin pandas ni Python en tiempo de petición. Las combinaciones
+# se reparten entre procesos.
+#
+#   python -m brfss.export dist/ --workers 8 --gzip
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.graph_objects as go
+
+from brfss.data import CSV_PATH, load_dataset
+from brfss.figures import CHARTS, build_chart
+from brfss.views import compute_selection, dump_json, frame_payload
+
+_DATASET = None
+
+
+def selection_slug(tema, edad):
+    # Nombre de fichero estable y seguro para URL de una combinación
+    return hashlib.blake2b(f"{tema}\x1f{edad}".encode(), digest_size=8).hexdigest()
+
+
+def selection_payload(dataset, tema, edad, charts):
+    views = compute_selection(dataset, tema, edad)
+    avg_val, rows, states = views['summary']
+    return {
+        'tema': tema,
+        'edad': edad,
+        'summary': {
+            'avg': None if math.isnan(avg_val) else round(float(avg_val), 4),
+            'rows': rows,
+            'states': int(states),
+        },
+        'views': {name: frame_payload(df) for name, df in views.items() if name != 'summary'},
+        # Igual que en las páginas, los gráficos de vistas vacías no se generan
+        'figures': {
+            chart: figure_payload(build_chart(chart, views))
+            for chart in charts
+            if not views[CHARTS[chart][0]].empty
+        },
+    }
+
+
+def figure_payload(fig):
+    # Figura sin layout.template: la plantilla ocupa dos tercios del JSON y es la misma
+    # en todas, así que va una sola vez en index.json ('template') y el visor la reaplica
+    figure = json.loads(fig.to_json())
+    figure.get('layout', {}).pop('template', None)
+    return figure
+
+
+def figure_template():
+    return json.loads(go.Figure().to_json())['layout']['template']
+
+
+def write_bytes(path, data, compress):
+    # Escritura atómica; con `compress` se deja además la versión .gz para el CDN
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    if compress:
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(data, mtime=0))
+        os.replace(tmp_path, path + ".gz")
+
+
+def _init_worker(file_path):
+    global _DATASET
+    _DATASET = load_dataset(file_path)
+
+
+def export_selection(task):
+    tema, edad, out_dir, charts, compress = task
+    t0 = time.perf_counter()
+    data = dump_json(selection_payload(_DATASET, tema, edad, charts))
+    name = f"{selection_slug(tema, edad)}.json"
+    write_bytes(os.path.join(out_dir, "data", name), data, compress)
+    return {'tema': tema, 'edad': edad, 'file': f"data/{name}", 'bytes': len(data),
+            'seconds': time.perf_counter() - t0}
+
+
+def export_bundle(out_dir, file_path=CSV_PATH, charts=None, workers=None, compress=False):
+    # Escribe el paquete completo y devuelve el catálogo (también en index.json)
+    t0 = time.perf_counter()
+    charts = list(charts or CHARTS)
+    dataset = load_dataset(file_path)
+    filters = dataset['filters']
+    tasks = [
+        (tema, edad, out_dir, charts, compress)
+        for tema in filters['temas']
+        for edad in filters['edades']
+    ]
+    os.makedirs(os.path.join(out_dir, "data"), exist_ok=True)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        _init_worker(file_path)
+        entries = [export_selection(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(file_path,)) as pool:
+            entries = list(pool.map(export_selection, tasks))
+
+    index = {
+        'version': dataset['version'],
+        'generated': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'temas': filters['temas'],
+        'edades': filters['edades'],
+        'charts': charts,
+        'template': figure_template(),
+        'selections': [{k: e[k] for k in ('tema', 'edad', 'file')} for e in entries],
+    }
+    write_bytes(os.path.join(out_dir, "index.json"), dump_json(index), compress)
+    index['stats'] = {
+        'selections': len(entries),
+        'bytes': sum(e['bytes'] for e in entries),
+        'workers': workers,
+        'seconds': time.perf_counter() - t0,
+    }
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta todas las selecciones del informe a JSON estático.")
+    parser.add_argument("out_dir", help="directorio de salida")
+    parser.add_argument("--csv", default=CSV_PATH, help="CSV del BRFSS (por defecto el del repositorio)")
+    parser.add_argument("--charts", nargs="+", choices=sorted(CHARTS), help="gráficos a exportar (por defecto todos)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--gzip", action="store_true", help="escribe también copias .gz precomprimidas")
+    args = parser.parse_args(argv)
+
+    index = export_bundle(args.out_dir, args.csv, args.charts, args.workers, args.gzip)
+    stats = index['stats']
+    print(
+        f"{stats['selections']} selecciones · {stats['bytes'] / 1e6:.2f} MB · "
+        f"{stats['workers']} procesos · {stats['seconds']:.2f} s → {args.out_dir}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# Figuras Plotly de los informes (sin dependencia de Streamlit). CHARTS asocia
+# cada gráfico, con el mismo id que usa cached_figure(), a la vista de
+# selection_views() que dibuja; lo usan las páginas y la exportación estática.
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+from brfss.views import trim_geo
+
+CI_LABELS = {'ci_plus': 'IC 95 % (+)', 'ci_minus': 'IC 95 % (−)'}
+
+
+def with_ci_errors(df):
+    # Distancias de la media a los límites del IC agrupado, para error_x/error_y
+    return df.assign(
+        ci_plus=df['High_Confidence_Limit'] - df['Data_Value'],
+        ci_minus=df['Data_Value'] - df['Low_Confidence_Limit'],
+    )
+
+
+def add_ci_band(fig, df, x, color):
+    # Banda del IC al 95 % detrás de la línea: límite superior y relleno hasta el inferior
+    upper = go.Scatter(x=df[x], y=df['High_Confidence_Limit'], mode='lines', line=dict(width=0),
+                       hoverinfo='skip', showlegend=False)
+    lower = go.Scatter(x=df[x], y=df['Low_Confidence_Limit'], mode='lines', line=dict(width=0),
+                       fill='tonexty', fillcolor=color, name='IC 95 %', hoverinfo='skip')
+    return go.Figure([upper, lower] + list(fig.data), layout=fig.layout)
+
+
+def build_fig_trend(df_trend):
+    fig_trend = px.line(
+        df_trend,
+        x="YearStart",
+        y="Data_Value",
+        markers=True,
+        labels={"YearStart": "Año", "Data_Value": "Prevalencia (%)"}
+    )
+    fig_trend.update_traces(line=dict(color="#1E3A8A", width=3))
+    return add_ci_band(fig_trend, df_trend, "YearStart", "rgba(30, 58, 138, 0.15)")
+
+
+def build_fig_extremes(df_extremes, color_scale, category_order):
+    fig = px.bar(
+        with_ci_errors(df_extremes),
+        x='Data_Value',
+        y='LocationDesc',
+        orientation='h',
+        color='Data_Value',
+        error_x='ci_plus',
+        error_x_minus='ci_minus',
+        color_continuous_scale=color_scale,
+        labels={'Data_Value': 'Tasa de Prevalencia (%)', 'LocationDesc': 'Estado', **CI_LABELS}
+    )
+    fig.update_layout(showlegend=False, yaxis={'categoryorder': category_order})
+    return fig
+
+
+def build_fig_ranking(df_ranking):
+    fig_rank = px.bar(
+        with_ci_errors(df_ranking.head(10)),
+        x='Data_Value',
+        y='LocationDesc',
+        orientation='h',
+        color='Data_Value',
+        error_x='ci_plus',
+        error_x_minus='ci_minus',
+        color_continuous_scale="Blues",
+        labels=CI_LABELS
+    )
+    fig_rank.update_layout(showlegend=False)
+    return fig_rank
+
+
+def build_fig_gender(gender_data, value_label):
+    return px.bar(
+        gender_data,
+        x='Stratification1',
+        y='Data_Value',
+        color='Stratification2',
+        barmode='group',
+        color_discrete_map={'Female': '#EC4899', 'Male': '#1E40AF'},
+        labels={'Data_Value': value_label, 'Stratification1': 'Edad'}
+    )
+
+
+def build_fig_map(df_geo, color_scale, value_label):
+    fig_map = px.choropleth(
+        trim_geo(df_geo),
+        locations='LocationAbbr',
+        locationmode="USA-states",
+        color='Data_Value',
+        scope="usa",
+        color_continuous_scale=color_scale,
+        labels={'Data_Value': value_label, 'Low_Confidence_Limit': 'IC 95 % inf.', 'High_Confidence_Limit': 'IC 95 % sup.'},
+        hover_name='LocationDesc',
+        hover_data={'Low_Confidence_Limit': True, 'High_Confidence_Limit': True}
+    )
+    return fig_map
+
+
+def build_d1_map(df_geo):
+    fig_map = build_fig_map(df_geo, ["#DBEAFE", "#3B82F6", "#1E3A8A"], 'Tasa de Prevalencia (%)')
+    fig_map.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
+    return fig_map
+
+
+CHARTS = {
+    # Informe de prevalencia (d1.py)
+    "d1-trend": ('trend', build_fig_trend),
+    "d1-top": ('ranking', lambda df: build_fig_extremes(df.head(5), 'Reds', 'total ascending')),
+    "d1-bottom": ('ranking', lambda df: build_fig_extremes(df.tail(5), 'Greens', 'total descending')),
+    "d1-gender": ('gender', lambda df: build_fig_gender(df, 'Tasa de Prevalencia Promedio (%)')),
+    "d1-map": ('geo', build_d1_map),
+    # Informe nacional (d2.py)
+    "d2-trend": ('trend', build_fig_trend),
+    "d2-gender": ('gender', lambda df: build_fig_gender(df, 'Prevalencia (%)')),
+    "d2-ranking": ('ranking', build_fig_ranking),
+    "d2-map": ('geo', lambda df: build_fig_map(df, "Blues", 'Prevalencia (%)')),
+}
+
+
+def build_chart(chart, views):
+    # Figura `chart` a partir de las vistas de una selección
+    view, build = CHARTS[chart]
+    return build(views[view])
@@ -0,0 +1,176 @@
+# Ingesta incremental de nuevas publicaciones del BRFSS. Cada extracto fechado
+# del CDC es una instantánea completa: las filas nuevas o modificadas (por clave
+# primaria) se insertan o reemplazan y las claves que ya no aparecen se borran,
+# de modo que el resultado es el mismo que cargar el CSV desde cero. Lo que se
+# ahorra es el cubo, que solo se recalcula para los (tema, año, estado)
+# afectados; la lectura del CSV (o de su caché Feather), la comparación con el
+# frame actual y la reindexación siguen siendo proporcionales al extracto.
+#
+#   python -m brfss.incremental Alzheimer's_..._20260321.csv
+#   python -m brfss.incremental --verify Alzheimer's_..._20260321.csv   # compara con la carga completa
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from brfss.analytics import build_cube
+from brfss.data import (
+    CSV_PATH,
+    ROW_KEY,
+    align_categories,
+    build_dataset,
+    dataset_from_frame,
+    file_fingerprint,
+    load_cached_brfss,
+    load_dataset,
+)
+
+# Claves del cubo que se recalculan cuando cambia alguna de sus filas
+AFFECTED_KEYS = ['YearStart', 'LocationAbbr']
+
+
+def diff_rows(current, release, key=ROW_KEY):
+    # Máscaras (sobre `release`) de filas nuevas y de filas cuya clave existe pero con valores distintos,
+    # y posiciones en `current` de las filas que se reemplazan
+    current, release = align_categories(current, release)
+    positions = pd.MultiIndex.from_frame(current[key]).get_indexer(pd.MultiIndex.from_frame(release[key]))
+    inserted = positions < 0
+
+    columns = [c for c in release.columns if c in current.columns and c not in key]
+    matched = ~inserted
+    old = current.iloc[positions[matched]][columns].reset_index(drop=True)
+    new = release.loc[matched, columns].reset_index(drop=True)
+    same = (old == new) | (old.isna() & new.isna())
+    changed = np.zeros(len(release), dtype=bool)
+    changed[np.flatnonzero(matched)] = ~same.all(axis=1).to_numpy()
+
+    return inserted, changed, positions[changed]
+
+
+def update_cube(cube, merged, touched, col_tema):
+    # Recalcula el cubo solo para los (tema, año, estado) afectados
+    keys = [col_tema] + AFFECTED_KEYS
+    affected = pd.MultiIndex.from_frame(touched[keys].drop_duplicates())
+    stale = pd.MultiIndex.from_frame(cube[keys]).isin(affected)
+    rows = merged[pd.MultiIndex.from_frame(merged[keys]).isin(affected)]
+    fresh = build_cube(rows, col_tema)
+    kept, fresh = align_categories(cube[~stale], fresh)
+    return pd.concat([kept, fresh], ignore_index=True), len(affected)
+
+
+def ingest_release(dataset, release_path):
+    # Devuelve un dataset nuevo (el recibido no se modifica) y un resumen de la ingesta
+    if dataset.get('streaming'):
+        raise ValueError("La ingesta incremental necesita las filas en memoria; recargue el CSV completo en modo streaming")
+    t0 = time.perf_counter()
+    # El frame del extracto es el mismo que produciría una carga completa (y queda en
+    # su caché Feather con el hash del propio CSV), así que la versión es coherente
+    # entre réplicas que lo ingieren y réplicas que lo leen desde cero
+    release, stats = load_cached_brfss(release_path)
+
+    current = dataset['df']
+    unique = release.drop_duplicates(ROW_KEY, keep='last')
+    inserted, changed, replaced = diff_rows(current, unique)
+    current_keys, release_keys = align_categories(current[ROW_KEY], release[ROW_KEY])
+    deleted = ~pd.MultiIndex.from_frame(current_keys).isin(pd.MultiIndex.from_frame(release_keys))
+
+    # Las filas reemplazadas y las borradas también afectan a su grupo anterior del cubo
+    touched = pd.concat(
+        align_categories(unique[inserted | changed], current.iloc[replaced], current[deleted]),
+        ignore_index=True,
+    )
+    col_tema = dataset['col_tema']
+    cube, groups = update_cube(dataset['cube']['frame'], release, touched, col_tema)
+
+    report = {
+        "inserted": int(inserted.sum()),
+        "updated": int(changed.sum()),
+        "deleted": int(deleted.sum()),
+        "unchanged": int(len(unique) - inserted.sum() - changed.sum()),
+        "cube_groups_recomputed": groups,
+        "rows": len(release),
+        "seconds": time.perf_counter() - t0,
+    }
+    updated = dataset_from_frame(release, stats, file_fingerprint(release_path)["hash"], cube=cube)
+    updated['source'] = os.path.abspath(release_path)
+    return updated, report
+
+
+def sorted_rows(df, keys):
+    # Filas en un orden canónico y sin categóricas, para comparar frames con distinto orden
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.sort_values(keys, kind='stable').reset_index(drop=True) if keys else df.reset_index(drop=True)
+
+
+def verify_ingest(dataset, release_path, rtol=1e-6):
+    # Comprueba que la ingesta incremental da lo mismo que cargar el extracto desde
+    # cero: mismas filas y, para cada selección, las mismas vistas. Devuelve las
+    # diferencias encontradas (lista vacía si coinciden).
+    from brfss.views import compute_selection
+
+    incremental, _ = ingest_release(dataset, release_path)
+    full = build_dataset(release_path)
+    problems = []
+
+    try:
+        pd.testing.assert_frame_equal(
+            sorted_rows(incremental['df'], ROW_KEY), sorted_rows(full['df'], ROW_KEY), check_like=True,
+        )
+    except AssertionError as exc:
+        problems.append(f"filas: {exc}")
+    for name in ('temas', 'edades'):
+        if incremental['filters'][name] != full['filters'][name]:
+            problems.append(f"{name} distintos")
+
+    for tema in full['filters']['temas']:
+        for edad in full['filters']['edades']:
+            got = compute_selection(incremental, tema, edad)
+            expected = compute_selection(full, tema, edad)
+            for view, frame in expected.items():
+                if not isinstance(frame, pd.DataFrame):
+                    if not np.allclose(np.asarray(got[view], dtype=float), np.asarray(frame, dtype=float),
+                                       rtol=rtol, equal_nan=True):
+                        problems.append(f"{view} de ({tema}, {edad})")
+                    continue
+                # Los empates del ranking pueden ordenarse distinto: se compara sin orden
+                keys = [c for c in frame.columns if not pd.api.types.is_float_dtype(frame[c])]
+                try:
+                    pd.testing.assert_frame_equal(
+                        sorted_rows(got[view], keys), sorted_rows(frame, keys),
+                        check_dtype=False, check_categorical=False, rtol=rtol,
+                    )
+                except AssertionError:
+                    problems.append(f"{view} de ({tema}, {edad})")
+    return problems
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    verify = "--verify" in argv
+    argv = [a for a in argv if a != "--verify"]
+    if not argv:
+        print("Uso: python -m brfss.incremental [--verify] NUEVO.csv [BASE.csv]")
+        return 2
+    release_path = argv[0]
+    base_path = argv[1] if len(argv) > 1 else CSV_PATH
+    base = load_dataset(base_path)
+    if verify:
+        problems = verify_ingest(base, release_path)
+        for problem in problems:
+            print(f"DIFERENCIA: {problem}")
+        print("La ingesta incremental coincide con la carga completa" if not problems
+              else f"{len(problems)} diferencias con la carga completa")
+        return 1 if problems else 0
+
+    _, report = ingest_release(base, release_path)
+    print(f"{os.path.basename(release_path)}: {report['inserted']} nuevas, {report['updated']} modificadas, "
+          f"{report['deleted']} borradas, {report['unchanged']} sin cambios; "
+          f"{report['cube_groups_recomputed']} grupos del cubo recalculados en {report['seconds']:.2f} s "
+          f"({report['rows']} filas)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# Medición de memoria y de tiempos del proceso para las cargas, los informes y
+# los benchmarks.
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class RSSSampler:
+    # Pico de RSS durante un bloque, muestreando /proc/self/statm en un hilo aparte
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        except OSError:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def peak_delta(self):
+        # Crecimiento máximo del RSS respecto al inicio del bloque
+        return max(self.peak - self.start, 0)
+
+
+# ---------------- TRAMOS DE TIEMPO ----------------
+#
+# span() cronometra un bloque y lo acumula en SPANS (ventana de las últimas
+# mediciones por nombre, para percentiles) y en la traza del rerun en curso, si
+# la hay. Las páginas abren una traza con start_trace() y la cierran con
+# finish(): se registra el total, se emite una línea JSON en el logger
+# "brfss.trace" y, con BRFSS_METRICS_FILE, se reescribe un fichero de texto con
+# formato Prometheus (para el textfile collector de node_exporter) como mucho
+# una vez cada BRFSS_METRICS_INTERVAL segundos.
+
+SPAN_WINDOW = int(os.environ.get("BRFSS_SPAN_WINDOW", 2048))
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS_FILE = os.environ.get("BRFSS_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("BRFSS_METRICS_INTERVAL", 10))
+
+_TRACE = contextvars.ContextVar("brfss_trace", default=None)
+_METRICS_LOCK = threading.Lock()
+_METRICS_WRITTEN = None
+TRACE_LOG = logging.getLogger("brfss.trace")
+if os.environ.get("BRFSS_TRACE_LOG") == "1" and not TRACE_LOG.handlers:
+    TRACE_LOG.addHandler(logging.StreamHandler())
+    TRACE_LOG.setLevel(logging.INFO)
+
+
+class SpanStats:
+    # Duraciones por nombre de tramo: ventana acotada para percentiles y totales acumulados
+
+    def __init__(self, window=SPAN_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + seconds)
+
+    def summary(self):
+        # {tramo: {count, sum, p50, p95, p99, max}} con los tiempos en segundos
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+            totals = dict(self._totals)
+        result = {}
+        for name, values in sorted(samples.items()):
+            count, total = totals[name]
+            quantiles = np.quantile(values, QUANTILES)
+            result[name] = {'count': count, 'sum': total, 'max': float(values.max())}
+            result[name].update({f"p{round(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)})
+        return result
+
+    def prometheus(self):
+        lines = [
+            "# HELP brfss_span_seconds Duración de los tramos instrumentados del informe.",
+            "# TYPE brfss_span_seconds summary",
+        ]
+        for name, stats in self.summary().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'brfss_span_seconds{{span="{label}",quantile="{q}"}} {stats[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'brfss_span_seconds_sum{{span="{label}"}} {stats["sum"]:.6f}')
+            lines.append(f'brfss_span_seconds_count{{span="{label}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+SPANS = SpanStats()
+
+
+@contextlib.contextmanager
+def span(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        SPANS.record(name, seconds)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.spans.append((name, seconds))
+
+
+class Trace:
+    # Tramos de un rerun de una página, en orden de ejecución
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.seconds = None
+        self._t0 = time.perf_counter()
+        self._token = _TRACE.set(self)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._t0
+        _TRACE.reset(self._token)
+        SPANS.record(f"rerun.{self.name}", self.seconds)
+
+        if TRACE_LOG.isEnabledFor(logging.INFO):
+            TRACE_LOG.info(json.dumps({
+                'trace': self.name,
+                'ms': round(self.seconds * 1e3, 3),
+                'spans': [[name, round(seconds * 1e3, 3)] for name, seconds in self.spans],
+            }))
+        if METRICS_FILE:
+            refresh_prometheus(METRICS_FILE)
+        return self
+
+
+def start_trace(name):
+    return Trace(name)
+
+
+def write_prometheus(path):
+    # Reemplazo atómico para que el colector nunca lea un fichero a medias; cada
+    # llamada escribe en su propio temporal, así que varios hilos no se pisan
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        # mkstemp crea el fichero con 0600; el colector puede correr con otro usuario
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(SPANS.prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def refresh_prometheus(path, interval=None):
+    # Reescribe el fichero si han pasado `interval` segundos desde la última vez.
+    # Un solo hilo escribe; los reruns que coinciden con él no esperan. Devuelve si escribió.
+    global _METRICS_WRITTEN
+    interval = METRICS_INTERVAL if interval is None else interval
+    if not _METRICS_LOCK.acquire(blocking=False):
+        return False
+    try:
+        now = time.monotonic()
+        if _METRICS_WRITTEN is not None and now - _METRICS_WRITTEN < interval:
+            return False
+        write_prometheus(path)
+        _METRICS_WRITTEN = now
+        return True
+    finally:
+        _METRICS_LOCK.release()
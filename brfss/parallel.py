@@ -0,0 +1,150 @@
+# Carga en paralelo (un proceso por núcleo) de varios CSV del BRFSS o de bloques
+# por rango de bytes de un CSV grande. Cada bloque se lee y se limpia en su
+# proceso; el resultado se concatena con categorías unificadas.
+#
+#   python -m brfss.parallel "datos/*.csv" --workers 8
+
+import argparse
+import glob
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from brfss.data import COMPACT_MEMORY, ROW_KEY, align_categories, build_brfss
+
+CHUNK_BYTES = int(os.environ.get("BRFSS_CHUNK_BYTES", 64 << 20))
+
+
+def resolve_sources(sources):
+    # Acepta una ruta, un patrón glob o una lista de ambos
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        matches = sorted(glob.glob(source))
+        paths.extend(matches or [source])
+    return paths
+
+
+def byte_ranges(file_path, chunk_bytes=CHUNK_BYTES):
+    # Rangos [inicio, fin) alineados a saltos de línea, sin incluir la cabecera.
+    # Supone que ningún campo entrecomillado contiene saltos de línea (así es el export del CDC).
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def plan_tasks(paths, chunk_bytes=CHUNK_BYTES):
+    tasks = []
+    for path in paths:
+        if os.path.getsize(path) > chunk_bytes:
+            tasks.extend((path, start, end) for start, end in byte_ranges(path, chunk_bytes))
+        else:
+            tasks.append((path, None, None))
+    return tasks
+
+
+def _init_worker():
+    # Un hilo de Arrow por proceso: el paralelismo lo pone el pool
+    try:
+        import pyarrow
+        pyarrow.set_cpu_count(1)
+        pyarrow.set_io_thread_count(1)
+    except ImportError:
+        pass
+
+
+def load_part(task):
+    path, start, end = task
+    if start is None:
+        return build_brfss(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(start)
+        body = f.read(end - start)
+    return build_brfss(io.BytesIO(header + body))
+
+
+def merge_stats(parts, seconds, workers):
+    stats = {
+        "engine": f"paralelo x{workers}",
+        "rows": sum(s["rows"] for s in parts),
+        "seconds": seconds,
+        "peak_mb": sum(s.get("peak_mb", 0) for s in parts),
+        "geo_malformed": sum(s.get("geo_malformed", 0) for s in parts),
+        "coerced": {},
+        "parts": len(parts),
+    }
+    for s in parts:
+        for col, n in s.get("coerced", {}).items():
+            stats["coerced"][col] = stats["coerced"].get(col, 0) + n
+    if COMPACT_MEMORY:
+        stats["memory"] = {
+            "raw_mb": sum(s["memory"].get("raw_mb", 0) for s in parts if "memory" in s),
+            "before_mb": sum(s["memory"]["before_mb"] for s in parts if "memory" in s),
+            "after_mb": sum(s["memory"]["after_mb"] for s in parts if "memory" in s),
+        }
+    return stats
+
+
+def load_parallel(sources, workers=None, chunk_bytes=CHUNK_BYTES, dedupe=True):
+    # Devuelve (df, stats) como build_brfss(). Con `dedupe`, si una clave aparece en
+    # varios archivos se quedan sus filas del último (los extractos se ordenan por
+    # nombre); las claves repetidas dentro de un mismo archivo se conservan, como en
+    # la carga en serie.
+    t0 = time.perf_counter()
+    paths = resolve_sources(sources)
+    tasks = plan_tasks(paths, chunk_bytes)
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    if workers <= 1:
+        results = [load_part(task) for task in tasks]
+    else:
+        # spawn y no fork: el proceso que carga puede ser el servidor de Streamlit o el
+        # hilo de actualización, y hacer fork de un proceso con hilos puede bloquear a los hijos
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=context) as pool:
+            results = list(pool.map(load_part, tasks))
+
+    frames = align_categories(*[df for df, _ in results])
+    df = pd.concat(frames, ignore_index=True)
+    if dedupe and len(set(paths)) > 1 and all(c in df.columns for c in ROW_KEY):
+        # Índice del archivo de cada fila; de cada clave se conserva el último archivo que la trae
+        order = {path: i for i, path in enumerate(paths)}
+        source = np.repeat([order[path] for path, _, _ in tasks], [len(frame) for frame in frames])
+        last = pd.Series(source).groupby([df[c] for c in ROW_KEY], observed=True, dropna=False).transform('max')
+        df = df[source == last.to_numpy()].reset_index(drop=True)
+
+    return df, merge_stats([s for _, s in results], time.perf_counter() - t0, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga paralela de extractos BRFSS")
+    parser.add_argument("sources", nargs="+", help="rutas o patrones glob")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    args = parser.parse_args(argv)
+
+    df, stats = load_parallel(args.sources, workers=args.workers, chunk_bytes=args.chunk_mb << 20)
+    print(f"{stats['rows']} filas ({len(df)} tras deduplicar) de {stats['parts']} bloques "
+          f"en {stats['seconds']:.2f} s con {stats['engine']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# Actualización en caliente del dataset activo: un hilo en segundo plano vigila
+# el directorio de datos y, cuando aparece un CSV fechado más reciente (o cambia
+# el actual), construye el nuevo dataset fuera del camino de las peticiones (con
+# brfss.incremental si el actual está en memoria, recalculando solo los grupos
+# del cubo afectados), lo valida, precalcula las vistas y figuras de todas las selecciones y solo
+# entonces lo intercambia con swap_active_dataset(). Cada rerun lee `datos` una
+# vez al inicio, así que las sesiones a mitad de un rerun terminan con la versión
+# anterior y las cachés, con la versión en la clave, nunca mezclan ambas.
+#
+#   BRFSS_REFRESH_SECONDS=60 streamlit run app.py
+
+import logging
+import os
+import threading
+import time
+
+from brfss.data import (
+    DATA_DIR,
+    active_dataset,
+    build_dataset,
+    file_fingerprint,
+    latest_csv,
+    swap_active_dataset,
+    use_streaming,
+)
+from brfss.incremental import ingest_release
+from brfss.metrics import span
+
+REFRESH_SECONDS = float(os.environ.get("BRFSS_REFRESH_SECONDS", 300))
+# Se rechaza una versión con menos de esta fracción de las filas de la actual
+MIN_ROWS_RATIO = float(os.environ.get("BRFSS_REFRESH_MIN_ROWS_RATIO", 0.5))
+# …o con más de esta fracción de valores no numéricos en Data_Value
+MAX_COERCED_RATIO = float(os.environ.get("BRFSS_REFRESH_MAX_COERCED_RATIO", 0.05))
+
+LOG = logging.getLogger("brfss.refresh")
+
+_REFRESHER = None
+_REFRESHER_LOCK = threading.Lock()
+
+
+def validate_dataset(dataset, previous=None):
+    # Comprobaciones mínimas antes de publicar una versión; ValueError con los motivos
+    stats = dataset['stats']
+    filters = dataset['filters']
+    rows = stats.get('rows') or 0
+    problems = []
+    if not rows:
+        problems.append("el CSV no tiene filas")
+    if not filters['temas'] or not filters['edades']:
+        problems.append("no hay temas o grupos etarios")
+    coerced = stats.get('coerced', {}).get('Data_Value', 0)
+    if rows and coerced / rows > MAX_COERCED_RATIO:
+        problems.append(f"{coerced} valores no numéricos en Data_Value")
+    if previous is not None and rows < MIN_ROWS_RATIO * (previous['stats'].get('rows') or 0):
+        problems.append(f"{rows} filas frente a {previous['stats']['rows']} de la versión actual")
+    if problems:
+        raise ValueError("; ".join(problems))
+
+
+def warm_dataset(dataset, charts=None):
+    # Vistas de todas las selecciones y, si caben en la caché, sus figuras: el primer
+    # usuario tras la actualización no paga ningún cálculo. Devuelve las selecciones.
+    from brfss.figures import CHARTS, build_chart
+    from brfss.views import FIGURE_CACHE, cached_figure, selection_views
+
+    filters = dataset['filters']
+    selections = [(tema, edad) for tema in filters['temas'] for edad in filters['edades']]
+    charts = list(CHARTS if charts is None else charts)
+    if len(selections) * len(charts) > FIGURE_CACHE.max_entries // 2:
+        charts = []
+
+    for tema, edad in selections:
+        views = selection_views(dataset, tema, edad)
+        for chart in charts:
+            if not views[CHARTS[chart][0]].empty:
+                cached_figure(dataset, tema, edad, chart, lambda: build_chart(chart, views))
+    return len(selections)
+
+
+class DatasetRefresher:
+    # Sondea `data_dir` cada `interval` segundos; check() hace una sola pasada
+
+    def __init__(self, data_dir=DATA_DIR, interval=REFRESH_SECONDS):
+        self.data_dir = data_dir
+        self.interval = interval
+        self.status = {'checked': None, 'updated': None, 'error': None}
+        self._rejected = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        # Publica el CSV más reciente si difiere del activo; devuelve el informe o None
+        self.status['checked'] = time.time()
+        file_path = latest_csv(self.data_dir)
+        current = active_dataset()
+        version = file_fingerprint(file_path)['hash']
+        if version in (current['version'], self._rejected):
+            return None
+
+        t0 = time.perf_counter()
+        try:
+            with span("refresh.build"):
+                if current.get('streaming') or use_streaming(file_path):
+                    dataset, ingest = build_dataset(file_path), None
+                else:
+                    dataset, ingest = ingest_release(current, file_path)
+            validate_dataset(dataset, current)
+            with span("refresh.warm"):
+                selections = warm_dataset(dataset)
+        except Exception as exc:
+            # La versión actual sigue publicada; el CSV rechazado no se reconstruye hasta que cambie
+            self._rejected = version
+            self.status['error'] = f"{os.path.basename(file_path)}: {exc}"
+            LOG.warning("Actualización descartada: %s", self.status['error'])
+            return None
+
+        swap_active_dataset(dataset)
+        report = {
+            'source': dataset['source'],
+            'version': dataset['version'],
+            'previous': current['version'],
+            'rows': dataset['stats'].get('rows'),
+            'selections': selections,
+            'ingest': ingest,
+            'seconds': time.perf_counter() - t0,
+        }
+        self.status.update(updated=time.time(), error=None)
+        LOG.info("Dataset actualizado: %s", report)
+        return report
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                LOG.exception("Error al comprobar el directorio de datos")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="brfss-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def start_refresher(data_dir=DATA_DIR, interval=REFRESH_SECONDS):
+    # Un único hilo por proceso; las llamadas siguientes devuelven el mismo.
+    # Con BRFSS_REFRESH_SECONDS=0 la actualización en caliente queda desactivada.
+    global _REFRESHER
+    if interval <= 0:
+        return None
+    with _REFRESHER_LOCK:
+        if _REFRESHER is None:
+            _REFRESHER = DatasetRefresher(data_dir, interval).start()
+    return _REFRESHER
@@ -0,0 +1,247 @@
+# Servicio HTTP/JSON con las mismas consultas que las pestañas de los informes,
+# sin Streamlit: tendencia, ranking, brecha por sexo, mapa por estado y filas
+# paginadas para un tema y un grupo etario. Lee del dataset compartido del
+# proceso (load_dataset), atiende peticiones en paralelo con un hilo por
+# conexión y memoriza las respuestas con ETag para devolver 304 a los clientes
+# que ya las tienen.
+#
+#   python -m brfss.service --port 8502
+#   curl "localhost:8502/trend?tema=...&edad=Overall"
+
+import argparse
+import gzip
+import hashlib
+import logging
+import math
+import os
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from brfss.cache import LRUCache
+from brfss.data import load_dataset
+from brfss.explorer import query_rows
+from brfss.metrics import SPANS, span
+from brfss.refresh import start_refresher
+from brfss.views import dump_json, frame_payload, selection_frame, selection_views
+
+# Respuestas ya serializadas (cuerpo, etag), acotadas por sus bytes
+RESPONSE_CACHE = LRUCache(
+    max_entries=int(os.environ.get("BRFSS_SERVICE_CACHE_ENTRIES", 1024)),
+    max_bytes=int(os.environ.get("BRFSS_SERVICE_CACHE_BYTES", 64 << 20)),
+    ttl=float(os.environ.get("BRFSS_SERVICE_CACHE_TTL", 3600)),
+    sizeof=lambda response: len(response[0]),
+)
+MAX_AGE = int(os.environ.get("BRFSS_SERVICE_MAX_AGE", 300))
+MAX_PAGE_SIZE = 1000
+GZIP_MIN_BYTES = 1024
+
+LOG = logging.getLogger("brfss.service")
+
+
+class QueryError(Exception):
+    # Parámetros inválidos o selección inexistente; se responde con `status`
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(params, name, default=None, cast=str):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise QueryError(f"falta el parámetro '{name}'")
+        return default
+    try:
+        return cast(values[-1])
+    except ValueError:
+        raise QueryError(f"valor inválido para '{name}': {values[-1]!r}") from None
+
+
+def _selection(dataset, params, with_edad=True):
+    filters = dataset['filters']
+    tema = _param(params, 'tema')
+    if tema not in filters['temas']:
+        raise QueryError(f"tema desconocido: {tema!r}", HTTPStatus.NOT_FOUND)
+    if not with_edad:
+        return tema, None
+    edad = _param(params, 'edad')
+    if edad not in filters['edades']:
+        raise QueryError(f"grupo etario desconocido: {edad!r}", HTTPStatus.NOT_FOUND)
+    return tema, edad
+
+
+def query_metadata(dataset, params):
+    filters = dataset['filters']
+    stats = dataset['stats']
+    return {
+        'version': dataset['version'],
+        'temas': filters['temas'],
+        'edades': filters['edades'],
+        'rows': stats.get('rows'),
+        'streaming': bool(dataset.get('streaming')),
+    }
+
+
+def query_summary(dataset, params):
+    tema, edad = _selection(dataset, params)
+    avg_val, rows, states = selection_views(dataset, tema, edad)['summary']
+    return {'tema': tema, 'edad': edad, 'avg': None if math.isnan(avg_val) else float(avg_val),
+            'rows': rows, 'states': int(states)}
+
+
+def query_trend(dataset, params):
+    tema, edad = _selection(dataset, params)
+    return {'tema': tema, 'edad': edad, 'data': frame_payload(selection_views(dataset, tema, edad)['trend'])}
+
+
+def query_ranking(dataset, params):
+    tema, edad = _selection(dataset, params)
+    n = _param(params, 'n', 10, int)
+    order = _param(params, 'order', 'top')
+    if n < 1 or order not in ('top', 'bottom'):
+        raise QueryError("'n' debe ser positivo y 'order' uno de top/bottom")
+    df_ranking = selection_views(dataset, tema, edad)['ranking']
+    df_ranking = df_ranking.head(n) if order == 'top' else df_ranking.tail(n)
+    return {'tema': tema, 'edad': edad, 'order': order, 'data': frame_payload(df_ranking)}
+
+
+def query_gender(dataset, params):
+    # La brecha por sexo cubre todos los grupos etarios del tema, como en la pestaña
+    tema, _ = _selection(dataset, params, with_edad=False)
+    edad = dataset['filters']['edades'][0]
+    return {'tema': tema, 'data': frame_payload(selection_views(dataset, tema, edad)['gender'])}
+
+
+def query_geo(dataset, params):
+    tema, edad = _selection(dataset, params)
+    return {'tema': tema, 'edad': edad, 'data': frame_payload(selection_views(dataset, tema, edad)['geo'])}
+
+
+def query_rows_page(dataset, params):
+    tema, edad = _selection(dataset, params)
+    page_size = _param(params, 'page_size', 50, int)
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise QueryError(f"'page_size' debe estar entre 1 y {MAX_PAGE_SIZE}")
+    columns = params.get('columns')
+    page_df, total, pages = query_rows(
+        selection_frame(dataset, tema, edad),
+        columns=columns[-1].split(",") if columns else None,
+        text=_param(params, 'q', "") or None,
+        sort_by=_param(params, 'sort', ""),
+        ascending=_param(params, 'desc', "0") != "1",
+        page=_param(params, 'page', 1, int),
+        page_size=page_size,
+    )
+    return {'tema': tema, 'edad': edad, 'total': total, 'pages': pages, 'data': frame_payload(page_df)}
+
+
+ROUTES = {
+    '/metadata': query_metadata,
+    '/summary': query_summary,
+    '/trend': query_trend,
+    '/ranking': query_ranking,
+    '/gender': query_gender,
+    '/geo': query_geo,
+    '/rows': query_rows_page,
+}
+
+
+def respond(path, query, file_path=None):
+    # (estado, cuerpo, etag) de una consulta; la clave incluye la versión del dataset
+    # para que un CSV nuevo no sirva respuestas anteriores. Sin `file_path` se usa el
+    # dataset activo, que brfss.refresh reemplaza al publicarse un CSV más reciente
+    query_fn = ROUTES.get(path)
+    if query_fn is None:
+        return HTTPStatus.NOT_FOUND, dump_json({'error': f"ruta desconocida: {path}"}), None
+    dataset = load_dataset(file_path)
+    params = parse_qs(query, keep_blank_values=True)
+    key = (dataset['version'], path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+
+    def compute():
+        body = dump_json(query_fn(dataset, params))
+        return body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+    try:
+        with span(f"service{path}"):
+            body, etag = RESPONSE_CACHE.get_or_compute(key, compute)
+    except QueryError as exc:
+        return exc.status, dump_json({'error': str(exc)}), None
+    return HTTPStatus.OK, body, etag
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = "brfss-service"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            return self._send(HTTPStatus.OK, b'{"status":"ok"}')
+        if url.path == '/metrics':
+            return self._send(HTTPStatus.OK, SPANS.prometheus().encode(), content_type="text/plain; version=0.0.4")
+
+        try:
+            status, body, etag = respond(url.path, url.query, self.server.file_path)
+        except Exception:
+            LOG.exception("Error al atender %s", self.path)
+            status, body, etag = HTTPStatus.INTERNAL_SERVER_ERROR, dump_json({'error': "error interno"}), None
+
+        if etag is not None and etag in self.headers.get('If-None-Match', ''):
+            return self._send(HTTPStatus.NOT_MODIFIED, b"", etag=etag)
+        self._send(status, body, etag=etag)
+
+    def _send(self, status, body, etag=None, content_type="application/json; charset=utf-8"):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        if status != HTTPStatus.NOT_MODIFIED:
+            if len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Type", content_type)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOG.info("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host="127.0.0.1", port=8502, file_path=None):
+    # Servidor listo para serve_forever(); con port=0 el sistema elige un puerto libre
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    server.file_path = file_path
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de consultas del informe BRFSS.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("BRFSS_SERVICE_PORT", 8502)))
+    parser.add_argument("--csv", default=None,
+                        help="CSV del BRFSS (por defecto el más reciente del directorio de datos, con actualización en caliente)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    load_dataset(args.csv)
+    if args.csv is None:
+        start_refresher()
+    server = make_server(args.host, args.port, args.csv)
+    LOG.info("Escuchando en http://%s:%d", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# Modo streaming para extractos del BRFSS que no caben en memoria: el CSV se lee
+# por bloques y de cada bloque solo se conserva su cubo parcial (suma y conteo de
+# Data_Value), que se fusiona con el acumulado. En memoria queda únicamente el
+# cubo; las filas crudas del explorador se obtienen bajo demanda filtrando el CSV
+# por bloques.
+#
+#   BRFSS_STREAMING=1 streamlit run app.py
+
+import os
+import time
+
+import pandas as pd
+
+from brfss.analytics import CUBE_FIELDS, CUBE_KEYS, build_cube
+from brfss.cache import LRUCache
+from brfss.data import (
+    CSV_SCHEMA,
+    CSV_SEP,
+    NUMERIC_COLUMNS,
+    align_categories,
+    build_filter_index,
+    clean_brfss,
+    file_fingerprint,
+    parse_decimal,
+    write_cache_manifest,
+)
+from brfss.metrics import RSSSampler
+
+CHUNK_ROWS = int(os.environ.get("BRFSS_STREAM_CHUNK_ROWS", 200_000))
+ROWS_LIMIT = int(os.environ.get("BRFSS_STREAM_ROWS_LIMIT", 100_000))
+
+# Filas de las selecciones ya consultadas en el explorador, acotadas en bytes
+ROWS_CACHE = LRUCache(
+    max_entries=32,
+    max_bytes=int(os.environ.get("BRFSS_STREAM_ROWS_CACHE_BYTES", 256 << 20)),
+)
+
+
+def iter_chunks(file_path, columns=None, chunk_rows=CHUNK_ROWS):
+    # Bloques del CSV con el esquema del informe; los numéricos se leen como texto
+    # para convertirlos con parse_decimal() igual que en la carga completa.
+    header = pd.read_csv(file_path, sep=CSV_SEP, nrows=0).columns
+    usecols = [c for c in header if c in CSV_SCHEMA and (columns is None or c in columns)]
+    dtype = {c: 'str' if c in NUMERIC_COLUMNS else CSV_SCHEMA[c] for c in usecols}
+    return pd.read_csv(
+        file_path, sep=CSV_SEP, engine='c', usecols=usecols, dtype=dtype,
+        chunksize=chunk_rows, on_bad_lines='skip',
+    )
+
+
+def merge_cubes(*cubes):
+    # Suma y conteo son aditivos: fusionar dos cubos es concatenar y volver a agrupar
+    cubes = [cube for cube in cubes if cube is not None]
+    keys = [c for c in cubes[0].columns if c not in CUBE_FIELDS]
+    merged = pd.concat(align_categories(*cubes), ignore_index=True)
+    return (
+        merged.groupby(keys, observed=True, dropna=False)[CUBE_FIELDS]
+        .sum()
+        .reset_index()
+    )
+
+
+def stream_cube(file_path, chunk_rows=CHUNK_ROWS):
+    # Una pasada por el CSV acumulando el cubo; la memoria depende del número de
+    # combinaciones (tema, estratos, estado, año), no del número de filas.
+    columns = ['Topic', 'Question', 'StratificationCategory1'] + NUMERIC_COLUMNS + CUBE_KEYS
+    cube, col_tema, edades = None, None, set()
+    stats = {'rows': 0, 'coerced': dict.fromkeys(NUMERIC_COLUMNS, 0), 'chunks': 0}
+
+    with RSSSampler() as sampler:
+        t0 = time.perf_counter()
+        for chunk in iter_chunks(file_path, columns, chunk_rows):
+            if col_tema is None:
+                col_tema = 'Topic' if 'Topic' in chunk.columns else 'Question'
+                chunk_columns = [col_tema] + [c for c in columns[2:] if c in chunk.columns]
+            chunk = chunk[chunk_columns]
+            for col in NUMERIC_COLUMNS:
+                if col in chunk.columns:
+                    chunk[col], coerced = parse_decimal(chunk[col])
+                    stats['coerced'][col] += coerced
+
+            if 'StratificationCategory1' in chunk.columns:
+                ages = chunk.loc[chunk['StratificationCategory1'] == 'Age Group', 'Stratification1']
+                edades.update(ages.dropna().unique())
+
+            cube = merge_cubes(cube, build_cube(chunk, col_tema))
+            stats['rows'] += len(chunk)
+            stats['chunks'] += 1
+        seconds = time.perf_counter() - t0
+
+    # Cada bloque añade categorías en orden de aparición; se ordenan como en la carga completa
+    for col in cube.select_dtypes('category').columns:
+        cube[col] = cube[col].cat.set_categories(sorted(cube[col].cat.categories))
+
+    stats.update({'engine': 'streaming', 'seconds': seconds, 'peak_mb': sampler.peak_delta / 1e6})
+    return cube, col_tema, sorted(edades), stats
+
+
+def build_streaming_dataset(file_path, chunk_rows=CHUNK_ROWS):
+    # Mismo contrato que dataset_from_frame() pero sin filas en memoria: 'df' es
+    # None y 'filters' solo lista temas y edades a partir del cubo.
+    fingerprint = file_fingerprint(file_path)
+    cube, col_tema, edades, stats = stream_cube(file_path, chunk_rows)
+    # Sin caché Feather, pero con manifiesto: así las comprobaciones periódicas del
+    # refresco no vuelven a calcular el hash de un CSV de varios GB que no cambió
+    write_cache_manifest(file_path, fingerprint, stats)
+    cube_index = build_filter_index(cube, col_tema)
+    filters = {
+        'frame': None,
+        'temas': cube_index['temas'],
+        'edades': edades or cube_index['edades'],
+        'tema_ranges': {},
+        'ranges': {},
+    }
+    return {
+        'version': fingerprint['hash'],
+        'df': None,
+        'stats': stats,
+        'col_tema': col_tema,
+        'filters': filters,
+        'cube': cube_index,
+        'streaming': True,
+        'source': os.path.abspath(file_path),
+    }
+
+
+def stream_rows(file_path, col_tema, tema, edad=None, limit=ROWS_LIMIT, chunk_rows=CHUNK_ROWS):
+    # Filas limpias de una selección, filtrando el CSV bloque a bloque; se detiene
+    # al reunir `limit` filas para acotar la memoria en selecciones muy grandes.
+    parts, found = [], 0
+    stats = {}
+    for chunk in iter_chunks(file_path, chunk_rows=chunk_rows):
+        mask = chunk[col_tema] == tema
+        if edad is not None:
+            mask &= chunk['Stratification1'] == edad
+        if not mask.any():
+            continue
+        match, stats = clean_brfss(chunk.loc[mask].reset_index(drop=True), {})
+        parts.append(match.head(limit - found))
+        found += len(parts[-1])
+        if found >= limit:
+            break
+
+    if not parts:
+        empty = pd.DataFrame(columns=[c for c in CSV_SCHEMA if c != 'Geolocation'])
+        return empty, {'rows': 0, 'truncated': False}
+    rows = pd.concat(align_categories(*parts), ignore_index=True)
+    return rows, {'rows': len(rows), 'truncated': found >= limit, 'coerced': stats.get('coerced', {})}
+
+
+def selection_rows(dataset, tema, edad=None):
+    # Filas crudas de la selección en modo streaming, memorizadas por versión del dataset
+    key = (dataset['version'], tema, edad)
+    rows, _ = ROWS_CACHE.get_or_compute(
+        key, lambda: stream_rows(dataset['source'], dataset['col_tema'], tema, edad)
+    )
+    return rows
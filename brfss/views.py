@@ -0,0 +1,97 @@
+# Resultados agregados por selección (tema, grupo etario), memorizados en una
+# caché LRU de proceso compartida por todas las sesiones.
+
+import json
+import os
+
+import pandas as pd
+
+from brfss.analytics import cube_summary, gender_gap, geo, ranking, trend
+from brfss.cache import LRUCache
+from brfss.data import select_rows
+from brfss.metrics import span
+
+
+def _env_number(name, default, cast=int):
+    value = os.environ.get(name)
+    return cast(value) if value else default
+
+
+SELECTION_CACHE = LRUCache(
+    max_entries=_env_number("BRFSS_SELECTION_CACHE_ENTRIES", 256),
+    max_bytes=_env_number("BRFSS_SELECTION_CACHE_BYTES", None),
+    ttl=_env_number("BRFSS_SELECTION_CACHE_TTL", 3600, float),
+)
+
+
+VIEWS = {
+    'summary': (cube_summary, 'mapa'),
+    'trend': (trend, 'mapa'),
+    'ranking': (ranking, 'mapa'),
+    'gender': (gender_gap, 'tema'),
+    'geo': (geo, 'mapa'),
+}
+
+
+def compute_selection(dataset, tema, edad):
+    cube = dataset['cube']
+    with span("filter.cube"):
+        parts = {'tema': select_rows(cube, tema), 'mapa': select_rows(cube, tema, edad)}
+    views = {}
+    for name, (aggregate, part) in VIEWS.items():
+        with span(f"agg.{name}"):
+            views[name] = aggregate(parts[part])
+    return views
+
+
+def selection_frame(dataset, tema, edad):
+    # Filas crudas de la selección: un slice del frame residente o, en modo
+    # streaming, una lectura filtrada del CSV por bloques
+    with span("filter.rows"):
+        if dataset.get('streaming'):
+            from brfss.streaming import selection_rows
+            return selection_rows(dataset, tema, edad)
+        return select_rows(dataset['filters'], tema, edad)
+
+
+def selection_views(dataset, tema, edad):
+    # La clave incluye la versión del dataset para no servir resultados de un CSV anterior
+    key = (dataset['version'], tema, edad)
+    with span("cache.selection"):
+        return SELECTION_CACHE.get_or_compute(key, lambda: compute_selection(dataset, tema, edad))
+
+
+# El tamaño de una figura es el de su JSON: es lo que se envía al navegador y
+# sys.getsizeof no ve los datos que cuelgan del objeto Plotly
+FIGURE_CACHE = LRUCache(
+    max_entries=_env_number("BRFSS_FIGURE_CACHE_ENTRIES", 512),
+    max_bytes=_env_number("BRFSS_FIGURE_CACHE_BYTES", None),
+    ttl=_env_number("BRFSS_FIGURE_CACHE_TTL", 3600, float),
+    sizeof=lambda fig: len(fig.to_json()),
+)
+
+
+def cached_figure(dataset, tema, edad, chart, build):
+    # Figura Plotly ya construida para (selección, gráfico); `build` solo corre en un fallo
+    key = (dataset['version'], tema, edad, chart)
+    with span(f"figure.{chart}"):
+        return FIGURE_CACHE.get_or_compute(key, build)
+
+
+def trim_geo(df_geo, decimals=2):
+    # Datos mínimos del mapa: valor e IC redondeados por estado con dato, sin columnas extra
+    values = ['Data_Value', 'Low_Confidence_Limit', 'High_Confidence_Limit']
+    df_geo = df_geo.loc[df_geo['Data_Value'].notna(), ['LocationAbbr', 'LocationDesc'] + values]
+    return df_geo.assign(**{col: df_geo[col].round(decimals) for col in values})
+
+
+def frame_payload(df):
+    # Tabla compacta por columnas; NaN/NA pasa a null
+    return {
+        col: [None if pd.isna(v) else v for v in df[col].tolist()]
+        for col in df.columns
+    }
+
+
+def dump_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
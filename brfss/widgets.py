@@ -0,0 +1,87 @@
+# Componentes Streamlit compartidos por los informes. Es el único módulo de
+# brfss que importa Streamlit; el resto del paquete se usa sin interfaz.
+
+import os
+
+import pandas as pd
+import streamlit as st
+
+from brfss.data import release_date
+from brfss.explorer import iter_export, query_rows
+from brfss.metrics import SPANS, span
+
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_MIME = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+
+def release_label(dataset):
+    # Mes y año del extracto activo (p. ej. "Feb 2026"); cambia con cada actualización en caliente
+    fecha = release_date(dataset['source'])
+    return f"{MESES[fecha.month - 1]} {fecha.year}"
+
+
+def render_explorer(frame, key, file_stem="datos"):
+    # Explorador paginado: filtros, orden y paginación se resuelven en el servidor
+    all_columns = list(frame.columns)
+    c_cols, c_text = st.columns([2, 1])
+    columns = c_cols.multiselect("Columnas", all_columns, default=all_columns, key=f"{key}_cols")
+    text = c_text.text_input("Filtrar texto", key=f"{key}_text")
+
+    c_sort, c_dir, c_size, c_page = st.columns(4)
+    sort_by = c_sort.selectbox("Ordenar por", ["(sin orden)"] + columns, key=f"{key}_sort")
+    ascending = c_dir.radio("Dirección", ["Ascendente", "Descendente"], horizontal=True, key=f"{key}_dir") == "Ascendente"
+    page_size = c_size.selectbox("Filas por página", PAGE_SIZES, index=1, key=f"{key}_size")
+    page = c_page.number_input("Página", min_value=1, step=1, key=f"{key}_page")
+
+    with span("explorer.query"):
+        page_df, total, pages = query_rows(
+            frame,
+            columns=columns,
+            text=text.strip() or None,
+            sort_by=sort_by,
+            ascending=ascending,
+            page=int(page),
+            page_size=page_size,
+        )
+    with span("dataframe.explorer"):
+        st.dataframe(page_df, width="stretch")
+
+    first = (min(int(page), pages) - 1) * page_size
+    st.caption(f"Filas {min(first + 1, total)}–{first + len(page_df)} de {total} · página {min(int(page), pages)} de {pages}")
+
+    # La exportación se genera por bloques solo al pulsar el botón, fuera del rerun
+    fmt = st.radio("Exportar como", list(EXPORT_MIME), horizontal=True, key=f"{key}_fmt")
+
+    def export():
+        export_frame, _, _ = query_rows(frame, columns=columns, text=text.strip() or None, page_size=max(len(frame), 1))
+        return b"".join(iter_export(export_frame, fmt))
+
+    st.download_button(
+        "Descargar selección",
+        data=export,
+        file_name=f"{file_stem}.{fmt}",
+        mime=EXPORT_MIME[fmt],
+        key=f"{key}_download",
+    )
+
+
+def debug_enabled():
+    # Panel de diagnóstico opcional: BRFSS_DEBUG=1 en el servidor o ?debug=1 en la URL
+    return os.environ.get("BRFSS_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+
+def render_trace_panel(trace):
+    # Tramos del último rerun y percentiles acumulados del proceso, en el sidebar
+    with st.sidebar.expander("Diagnóstico de rendimiento"):
+        st.caption(f"Rerun de {trace.name}: {trace.seconds * 1e3:.1f} ms")
+        st.dataframe(
+            pd.DataFrame(trace.spans, columns=['Tramo', 'ms']).assign(ms=lambda df: (df['ms'] * 1e3).round(2)),
+            hide_index=True,
+        )
+        summary = pd.DataFrame.from_dict(SPANS.summary(), orient='index')
+        if not summary.empty:
+            quantiles = ['p50', 'p95', 'p99', 'max']
+            summary[quantiles] = (summary[quantiles] * 1e3).round(2)
+            st.caption("Percentiles del proceso (ms)")
+            st.dataframe(summary[['count'] + quantiles], width="stretch")
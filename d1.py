@@ -1,7 +1,13 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import re
+
+from brfss import SELECTION_CACHE, cached_figure, load_dataset, selection_frame, selection_views
+from brfss.figures import build_chart
+from brfss.metrics import span, start_trace
+from brfss.refresh import start_refresher
+from brfss.widgets import debug_enabled, release_label, render_explorer, render_trace_panel
 
 # ---------------- CONFIGURACIÓN ----------------
 
@@ -37,36 +43,12 @@ st.markdown("""
 
 # ---------------- FUNCIONES ----------------
 
-def extract_coords(point_str):
-    try:
-        if pd.isna(point_str) or str(point_str).strip() == "":
-            return None, None
-        coords = re.findall(r"[-+]?\d*\.\d+|\d+", str(point_str))
-        if len(coords) >= 2:
-            return float(coords[1]), float(coords[0])
-    except:
-        return None, None
-    return None, None
-
-
-@st.cache_data
 def load_data():
-    file_path = "Alzheimer's_Disease_and_Healthy_Aging_Data_20260221.csv"
     try:
-        df = pd.read_csv(file_path, sep=None, engine='python', on_bad_lines='skip')
-
-        cols_to_fix = ['Data_Value', 'Low_Confidence_Limit', 'High_Confidence_Limit']
-        for col in cols_to_fix:
-            if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(',', '.')
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        if 'Geolocation' in df.columns:
-            coords = df['Geolocation'].apply(extract_coords)
-            df[['lat', 'lon']] = pd.DataFrame(coords.tolist(), index=df.index)
-
-        return df
+        # Dataset activo; el hilo de actualización publica las versiones nuevas del CSV
+        datos = load_dataset()
+        start_refresher()
+        return datos
 
     except Exception as e:
         st.error(f"Error en la carga de datos: {e}")
@@ -75,9 +57,13 @@ def load_data():
 
 # ---------------- APLICACIÓN ----------------
 
-df = load_data()
+traza = start_trace("d1")
+
+with span("load_data"):
+    datos = load_data()
 
-if df is not None:
+if datos is not None:
+    load_stats = datos['stats']
 
     # Título principal
     st.title("Prevalencia de Deterioro Cognitivo Funcional en Población Adulta de Estados Unidos")
@@ -104,34 +90,54 @@ Este indicador permite dimensionar la magnitud del fenómeno y compararlo entre
     """)
     st.sidebar.divider()
 
+    st.sidebar.caption(
+        f"Carga del CSV: {load_stats['rows']} filas en {load_stats['seconds']:.2f} s · "
+        f"pico {load_stats['peak_mb']:.1f} MB · motor {load_stats['engine']} · "
+        f"coordenadas inválidas: {load_stats.get('geo_malformed', 0)} · "
+        f"valores no numéricos: {sum(load_stats.get('coerced', {}).values())}"
+    )
+    st.sidebar.caption(f"Versión de datos: {os.path.basename(datos['source'])} ({datos['version'][:8]})")
+    if 'memory' in load_stats:
+        memoria = load_stats['memory']
+        # Las cachés anteriores al informe completo no traen la lectura sin esquema
+        sin_esquema = f"{memoria['raw_mb']:.2f} MB sin esquema → " if 'raw_mb' in memoria else ""
+        st.sidebar.caption(
+            f"Memoria del frame: {sin_esquema}{memoria['before_mb']:.2f} MB con esquema → "
+            f"{memoria['after_mb']:.2f} MB en modo compacto"
+        )
+    st.sidebar.divider()
+
     st.sidebar.header("Parámetros de Análisis")
 
-    col_tema = 'Topic' if 'Topic' in df.columns else 'Question'
-    temas = sorted(df[col_tema].dropna().unique())
-    tema_sel = st.sidebar.selectbox("Seleccione el Tema de Análisis:", temas)
+    filtros = datos['filters']
 
-    df_solo_edad = df[df['StratificationCategory1'] == 'Age Group']
-    edades = sorted(df_solo_edad['Stratification1'].dropna().unique())
-    if not edades:
-        edades = sorted(df['Stratification1'].dropna().unique())
+    temas = filtros['temas']
+    tema_sel = st.sidebar.selectbox("Seleccione el Tema de Análisis:", temas)
 
+    edades = filtros['edades']
     edad_sel = st.sidebar.selectbox("Seleccione el Grupo Etario:", edades)
 
-    df_base_tema = df[df[col_tema] == tema_sel]
-    df_mapa = df_base_tema[df_base_tema['Stratification1'] == edad_sel]
+    # Agregados de la selección, compartidos entre sesiones
+    vistas = selection_views(datos, tema_sel, edad_sel)
+
+    cache_stats = SELECTION_CACHE.stats()
+    st.sidebar.caption(
+        f"Caché de vistas: {cache_stats['hits']} aciertos · {cache_stats['misses']} fallos · "
+        f"{cache_stats['entries']} entradas"
+    )
 
     # Indicadores
     col1, col2, col3, col4 = st.columns(4)
-    avg_val = df_mapa['Data_Value'].mean()
+    avg_val, total_registros, total_estados = vistas['summary']
 
     col1.metric("Prevalencia Promedio", f"{avg_val:.2f}%" if not pd.isna(avg_val) else "N/A")
-    col2.metric("Total de Registros", len(df_mapa))
-    col3.metric("Estados Analizados", df_mapa['LocationAbbr'].nunique())
-    col4.metric("Actualización", "Feb 2026")
+    col2.metric("Total de Registros", total_registros)
+    col3.metric("Estados Analizados", total_estados)
+    col4.metric("Actualización", release_label(datos))
 
     st.divider()
 
-    # Tabs
+    # Tabs: solo se calcula y envía el contenido de la pestaña abierta
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "Evolución Temporal",
         "Comparativo Estatal",
@@ -139,97 +145,53 @@ Este indicador permite dimensionar la magnitud del fenómeno y compararlo entre
         "Mapa de Prevalencia",
         "Metodología",
         "Base de Datos"
-    ])
+    ], key="tabs_informe", on_change="rerun")
 
     # ---------------- TAB 1 ----------------
     with tab1:
         st.subheader("Tendencia Temporal de la Prevalencia")
         st.markdown('<div class="question-box">¿Cómo ha evolucionado la prevalencia de dificultad cognitiva funcional en el tiempo para el grupo seleccionado?</div>', unsafe_allow_html=True)
 
-        df_trend = (
-            df_mapa.groupby("YearStart")["Data_Value"]
-            .mean()
-            .reset_index()
-            .sort_values("YearStart")
-        )
+        df_trend = vistas['trend']
 
-        if not df_trend.empty:
-            fig_trend = px.line(
-                df_trend,
-                x="YearStart",
-                y="Data_Value",
-                markers=True,
-                labels={"YearStart": "Año", "Data_Value": "Prevalencia (%)"}
-            )
-            fig_trend.update_traces(line=dict(color="#1E3A8A", width=3))
-            st.plotly_chart(fig_trend, use_container_width=True)
+        if tab1.open and not df_trend.empty:
+            fig_trend = cached_figure(datos, tema_sel, edad_sel, "d1-trend", lambda: build_chart("d1-trend", vistas))
+            with span("plotly_chart.d1-trend"):
+                st.plotly_chart(fig_trend, width="stretch")
 
     # ---------------- TAB 2 ----------------
     with tab2:
         st.subheader("Comparativa de Extremos: Top 5 vs Bottom 5")
         st.markdown('<div class="question-box">¿Qué estados presentan los niveles más altos y más bajos de prevalencia?</div>', unsafe_allow_html=True)
 
-        df_ranking = (
-            df_mapa.groupby('LocationDesc')['Data_Value']
-            .mean()
-            .sort_values(ascending=False)
-            .reset_index()
-        )
+        df_ranking = vistas['ranking']
 
-        if not df_ranking.empty:
+        if tab2.open and not df_ranking.empty:
             c_top, c_bot = st.columns(2)
 
             with c_top:
                 st.markdown("**Estados con mayor prevalencia**")
-                fig_top = px.bar(
-                    df_ranking.head(5),
-                    x='Data_Value',
-                    y='LocationDesc',
-                    orientation='h',
-                    color='Data_Value',
-                    color_continuous_scale='Reds',
-                    labels={'Data_Value': 'Tasa de Prevalencia (%)', 'LocationDesc': 'Estado'}
-                )
-                fig_top.update_layout(showlegend=False, yaxis={'categoryorder':'total ascending'})
-                st.plotly_chart(fig_top, use_container_width=True)
+                fig_top = cached_figure(datos, tema_sel, edad_sel, "d1-top", lambda: build_chart("d1-top", vistas))
+                with span("plotly_chart.d1-top"):
+                    st.plotly_chart(fig_top, width="stretch")
 
             with c_bot:
                 st.markdown("**Estados con menor prevalencia**")
-                fig_bot = px.bar(
-                    df_ranking.tail(5),
-                    x='Data_Value',
-                    y='LocationDesc',
-                    orientation='h',
-                    color='Data_Value',
-                    color_continuous_scale='Greens',
-                    labels={'Data_Value': 'Tasa de Prevalencia (%)', 'LocationDesc': 'Estado'}
-                )
-                fig_bot.update_layout(showlegend=False, yaxis={'categoryorder':'total descending'})
-                st.plotly_chart(fig_bot, use_container_width=True)
+                fig_bot = cached_figure(datos, tema_sel, edad_sel, "d1-bottom", lambda: build_chart("d1-bottom", vistas))
+                with span("plotly_chart.d1-bottom"):
+                    st.plotly_chart(fig_bot, width="stretch")
 
     # ---------------- TAB 3 ----------------
     with tab3:
         st.subheader("Tasa de Prevalencia por Rango de Edad y Sexo")
         st.markdown('<div class="question-box">¿Existen diferencias en la prevalencia según edad y género?</div>', unsafe_allow_html=True)
 
-        gender_data = (
-            df_base_tema[df_base_tema['Stratification2'].isin(['Female', 'Male'])]
-            .groupby(['Stratification1', 'Stratification2'])['Data_Value']
-            .mean()
-            .reset_index()
-        )
+        gender_data = vistas['gender']
 
-        if not gender_data.empty:
-            fig_gen = px.bar(
-                gender_data,
-                x='Stratification1',
-                y='Data_Value',
-                color='Stratification2',
-                barmode='group',
-                color_discrete_map={'Female': '#EC4899', 'Male': '#1E40AF'},
-                labels={'Data_Value': 'Tasa de Prevalencia Promedio (%)', 'Stratification1': 'Edad'}
-            )
-            st.plotly_chart(fig_gen, use_container_width=True)
+        if tab3.open and not gender_data.empty:
+            fig_gen = cached_figure(datos, tema_sel, edad_sel, "d1-gender", lambda: build_chart("d1-gender", vistas))
+            with span("plotly_chart.d1-gender"):
+                st.plotly_chart(fig_gen, width="stretch")
 
             # Tabla con columnas renombradas
             gender_data_display = gender_data.rename(columns={
@@ -237,28 +199,20 @@ Este indicador permite dimensionar la magnitud del fenómeno y compararlo entre
                 'Stratification2': 'Sexo',
                 'Data_Value': 'tasa de prevalencia promedio'
             })
-            st.table(gender_data_display)
+            with span("table.d1-gender"):
+                st.table(gender_data_display)
 
     # ---------------- TAB 4 ----------------
     with tab4:
         st.subheader("Distribución Geográfica de la Prevalencia")
         st.markdown('<div class="question-box">¿Cómo se distribuye geográficamente la prevalencia en Estados Unidos?</div>', unsafe_allow_html=True)
 
-        df_geo = df_mapa.groupby(['LocationAbbr', 'LocationDesc'])['Data_Value'].mean().reset_index()
-
-        if not df_geo.empty:
-            fig_map = px.choropleth(
-                df_geo,
-                locations='LocationAbbr',
-                locationmode="USA-states",
-                color='Data_Value',
-                scope="usa",
-                color_continuous_scale=["#DBEAFE", "#3B82F6", "#1E3A8A"],
-                labels={'Data_Value': 'Tasa de Prevalencia (%)'},
-                hover_name='LocationDesc'
-            )
-            fig_map.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
-            st.plotly_chart(fig_map, use_container_width=True)
+        df_geo = vistas['geo']
+
+        if tab4.open and not df_geo.empty:
+            fig_map = cached_figure(datos, tema_sel, edad_sel, "d1-map", lambda: build_chart("d1-map", vistas))
+            with span("plotly_chart.d1-map"):
+                st.plotly_chart(fig_map, width="stretch")
 
     # ---------------- TAB 5 ----------------
     with tab5:
@@ -290,12 +244,28 @@ Este indicador permite dimensionar la magnitud del fenómeno y compararlo entre
     | Stratification1 | Clasificación por grupo de edad.                   | Texto        |
     | Stratification2 | Clasificación por género.                           | Texto        |
     | Geolocation     | Coordenadas para la representación en mapas.       | Geográfico   |
+
+    4. Agregación
+    - Tendencia, comparativo estatal y mapa muestran la media ponderada por el inverso de la varianza, con la varianza derivada del ancho del intervalo de confianza de cada registro  
+    - Las bandas y barras de error son el intervalo de confianza al 95 % agrupado  
+    - Los indicadores de cabecera y el análisis demográfico usan la media simple
     """)
 
     # ---------------- TAB 6 ----------------
     with tab6:
         st.subheader("Explorador de Datos del Informe")
-        st.dataframe(df_mapa, use_container_width=True)
+        if tab6.open:
+            df_mapa = selection_frame(datos, tema_sel, edad_sel)
+            if len(df_mapa) < total_registros:
+                st.caption(
+                    f"Modo streaming: se muestran las primeras {len(df_mapa)} de "
+                    f"{total_registros} filas de la selección."
+                )
+            render_explorer(df_mapa, key="d1_explorer", file_stem="brfss_seleccion")
 
 else:
     st.error("Error al cargar el recurso de datos. Verifique la integridad del archivo CSV.")
+
+traza.finish()
+if debug_enabled():
+    render_trace_panel(traza)
@@ -0,0 +1,146 @@
+import streamlit as st
+import pandas as pd
+
+from brfss.metrics import span, start_trace
+from brfss.widgets import debug_enabled, render_explorer, render_trace_panel
+from salary import GAP_DIMENSIONS, gap_views, load_salary_dataset
+from salary.figures import build_fig_gap, build_fig_means
+
+# ---------------- CONFIGURACIÓN ----------------
+
+st.set_page_config(
+    page_title="Informe: Brecha Salarial de Género",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.markdown("""
+    <style>
+    .main { background-color: #F5F7F9; }
+    .stMetric {
+        background-color: #FFFFFF;
+        padding: 15px;
+        border-radius: 6px;
+        border: 1px solid #E6E9EF;
+    }
+    h1, h2, h3 {
+        color: #1E3A8A;
+        font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif;
+    }
+    .question-box {
+        background-color: #EEF2FF;
+        padding: 12px;
+        border-radius: 6px;
+        border-left: 4px solid #1E3A8A;
+        margin-bottom: 15px;
+        font-size: 0.95rem;
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+VARIABLES = {
+    "Salario mensual": "monthly_salary",
+    "Compensación total": "total_compensation",
+}
+TABLE_COLUMNS = {
+    'female_mean': 'Media mujeres',
+    'male_mean': 'Media hombres',
+    'gap_pct': 'Brecha (%)',
+    'gap_pct_low': 'IC 95 % inf.',
+    'gap_pct_high': 'IC 95 % sup.',
+    'median_gap_pct': 'Brecha de medianas (%)',
+    'n_female': 'Mujeres',
+    'n_male': 'Hombres',
+}
+
+# ---------------- FUNCIONES ----------------
+
+def load_data():
+    try:
+        return load_salary_dataset()
+
+    except Exception as e:
+        st.error(f"Error en la carga de datos: {e}")
+        return None
+
+
+def format_pct(value):
+    return f"{value:.1f}%" if not pd.isna(value) else "N/A"
+
+
+# ---------------- APLICACIÓN ----------------
+
+traza = start_trace("d3")
+
+with span("load_data"):
+    datos = load_data()
+
+if datos is not None:
+    load_stats = datos['stats']
+
+    st.title("Brecha Salarial de Género en Colombia")
+
+    st.info("""
+**Fuente de los datos:** muestra de empleados en Colombia (colombia_salary_gap_analysis).
+La brecha se expresa como la diferencia entre el salario medio de hombres y mujeres, en porcentaje del salario medio masculino.
+Los intervalos de confianza al 95 % se obtienen por bootstrap estratificado por grupo y sexo.
+""")
+
+    st.divider()
+
+    st.sidebar.caption(
+        f"Carga del CSV: {load_stats['rows']} filas en {load_stats['seconds']:.2f} s · "
+        f"pico {load_stats['peak_mb']:.1f} MB · motor {load_stats['engine']}"
+    )
+    st.sidebar.divider()
+
+    st.sidebar.header("Parámetros de Análisis")
+    variable_sel = st.sidebar.selectbox("Variable salarial:", list(VARIABLES))
+    n_boot = st.sidebar.select_slider("Réplicas bootstrap:", [200, 500, 1000, 2000, 5000], value=1000)
+
+    # Brecha global y por dimensión, compartida entre sesiones
+    vistas = gap_views(datos, VARIABLES[variable_sel], n_boot)
+
+    total = vistas['total'].iloc[0]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Media Mujeres", f"${total['female_mean']:,.0f}")
+    col2.metric("Media Hombres", f"${total['male_mean']:,.0f}")
+    col3.metric("Brecha Salarial", format_pct(total['gap_pct']))
+    col4.metric("IC 95 % de la Brecha", f"{format_pct(total['gap_pct_low'])} – {format_pct(total['gap_pct_high'])}")
+
+    st.divider()
+
+    # Tabs: solo se calcula y envía el contenido de la pestaña abierta
+    tabs = st.tabs(list(GAP_DIMENSIONS.values()) + ["Base de Datos"], key="tabs_brecha", on_change="rerun")
+
+    for tab, (by, label) in zip(tabs, GAP_DIMENSIONS.items()):
+        with tab:
+            st.subheader(f"Brecha Salarial por {label}")
+            st.markdown(f'<div class="question-box">¿Cómo varía la brecha salarial de género según {label.lower()}?</div>', unsafe_allow_html=True)
+
+            df_gap = vistas[by]
+
+            if tab.open and not df_gap.empty:
+                c_gap, c_means = st.columns(2)
+                with c_gap, span(f"plotly_chart.d3-gap-{by}"):
+                    st.plotly_chart(build_fig_gap(df_gap, by, label), width="stretch")
+                with c_means, span(f"plotly_chart.d3-means-{by}"):
+                    st.plotly_chart(build_fig_means(df_gap, by, label), width="stretch")
+
+                with span(f"table.d3-{by}"):
+                    st.dataframe(
+                        df_gap.set_index(by)[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS).round(2),
+                        width="stretch",
+                    )
+
+    with tabs[-1]:
+        st.subheader("Explorador de Datos")
+        if tabs[-1].open:
+            render_explorer(datos['df'], key="d3_explorer", file_stem="brecha_salarial")
+
+else:
+    st.error("Error al cargar el recurso de datos. Verifique la integridad del archivo CSV.")
+
+traza.finish()
+if debug_enabled():
+    render_trace_panel(traza)
@@ -0,0 +1,13 @@
+from salary.analytics import (
+    GAP_DIMENSIONS,
+    bootstrap_gap,
+    gap_report,
+    gap_table,
+)
+from salary.data import (
+    SALARY_CSV_PATH,
+    build_salary_dataset,
+    clear_salary_cache,
+    load_salary_dataset,
+)
+from salary.views import GAP_CACHE, gap_views
@@ -0,0 +1,133 @@
+# Brecha salarial de género por grupo (sin dependencia de Streamlit): tablas con
+# groupby vectorizados e intervalos bootstrap calculados para todos los grupos a
+# la vez sobre arrays de NumPy.
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+GAP_DIMENSIONS = {
+    'department': 'Departamento',
+    'job_level': 'Nivel del cargo',
+    'education_level': 'Nivel educativo',
+}
+GENDERS = ['Female', 'Male']
+N_BOOT = int(os.environ.get("SALARY_N_BOOT", 1000))
+# Elementos (réplicas × filas) por bloque del bootstrap: acota la memoria a unos 50 MB
+BOOT_BLOCK_CELLS = int(os.environ.get("SALARY_BOOT_BLOCK_CELLS", 2_000_000))
+# Remuestreos por celda y réplica; por encima se reescala (ver bootstrap_gap)
+BOOT_MAX_DRAWS = int(os.environ.get("SALARY_BOOT_MAX_DRAWS", 2000))
+
+
+def _groups(df, by):
+    # Clave de grupo: la columna `by` o un único grupo 'Total' para la brecha global
+    if by is None:
+        return pd.Series(pd.Categorical(['Total'] * len(df)), index=df.index, name='grupo')
+    return df[by]
+
+
+def gap_table(df, by=None, value='monthly_salary'):
+    # Medias y medianas por sexo en cada grupo, brecha absoluta y relativa al salario masculino
+    # Los importes son enteros anulables; las medias se calculan en float64 (<NA> → NaN)
+    stats = (
+        df[value].astype('float64')
+        .groupby([_groups(df, by), df['gender']], observed=True)
+        .agg(['mean', 'median', 'count'])
+        .unstack('gender')
+        .reindex(columns=GENDERS, level='gender')
+    )
+    result = pd.DataFrame({
+        'female_mean': stats[('mean', 'Female')],
+        'male_mean': stats[('mean', 'Male')],
+        'female_median': stats[('median', 'Female')],
+        'male_median': stats[('median', 'Male')],
+        'n_female': stats[('count', 'Female')].fillna(0).astype('int64'),
+        'n_male': stats[('count', 'Male')].fillna(0).astype('int64'),
+    })
+    result['gap'] = result['male_mean'] - result['female_mean']
+    result['gap_pct'] = result['gap'] / result['male_mean'] * 100
+    result['median_gap_pct'] = (result['male_median'] - result['female_median']) / result['male_median'] * 100
+    return result.rename_axis(by or 'grupo').reset_index()
+
+
+def bootstrap_gap(df, by=None, value='monthly_salary', n_boot=N_BOOT, alpha=0.05, seed=0,
+                  workers=None, max_draws=BOOT_MAX_DRAWS):
+    # Bootstrap estratificado de la brecha relativa de medias: en cada réplica se
+    # remuestrea con reemplazo dentro de cada celda (grupo × sexo). Todas las
+    # celdas se resuelven en la misma pasada: cada posición toma un valor al azar
+    # de su celda y las medias salen de np.add.reduceat. Las celdas con más de
+    # `max_draws` filas remuestrean `max_draws` valores y reescalan la desviación
+    # de la media por √(m/n), de modo que la varianza es la de una réplica completa
+    # y el coste no crece con el número de filas.
+    groups = _groups(df, by).astype('category')
+    group_codes = groups.cat.codes.to_numpy()
+    gender_codes = pd.Categorical(df['gender'], categories=GENDERS).codes
+    values = df[value].to_numpy('float64', na_value=np.nan)
+    valid = (group_codes >= 0) & (gender_codes >= 0) & ~np.isnan(values)
+
+    n_cells = 2 * len(groups.cat.categories)
+    cell = (group_codes * 2 + gender_codes)[valid]
+    order = np.argsort(cell, kind='stable')
+    x = values[valid][order]
+
+    counts = np.bincount(cell, minlength=n_cells)
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    draws = np.minimum(counts, max_draws)
+    cell_mean = np.add.reduceat(x, starts[filled]) / counts[filled] if len(x) else np.empty(0)
+    shrink = np.sqrt(draws[filled] / counts[filled])
+
+    # Posiciones de remuestreo: `draws` por celda, cada una con el rango de su celda
+    slot_cell = np.repeat(np.arange(n_cells), draws)
+    slot_start = starts[slot_cell]
+    slot_count = counts[slot_cell]
+    segments = (np.cumsum(draws) - draws)[filled]
+
+    means = np.full((n_boot, n_cells), np.nan)
+    block = max(1, BOOT_BLOCK_CELLS // max(len(slot_cell), 1))
+    blocks = [(b0, min(b0 + block, n_boot)) for b0 in range(0, n_boot, block)] if len(x) else []
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    def run_block(args):
+        (b0, b1), block_seed = args
+        rng = np.random.default_rng(block_seed)
+        idx = slot_start + rng.integers(0, slot_count, size=(b1 - b0, len(slot_cell)))
+        sample_mean = np.add.reduceat(x[idx], segments, axis=1) / draws[filled]
+        means[b0:b1, filled] = cell_mean + (sample_mean - cell_mean) * shrink
+
+    # Los bloques escriben filas distintas de `means`; NumPy libera el GIL en la
+    # generación aleatoria y en reduceat, así que varios hilos sí se solapan
+    workers = max(1, min(workers or os.cpu_count() or 1, len(blocks)))
+    if workers == 1:
+        for args in zip(blocks, seeds):
+            run_block(args)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(run_block, zip(blocks, seeds)))
+
+    # Grupos sin alguno de los dos sexos quedan sin intervalo (NaN)
+    female, male = means[:, 0::2], means[:, 1::2]
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        gap_pct = (male - female) / male * 100
+        low, high = np.nanpercentile(gap_pct, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+
+    return pd.DataFrame({
+        by or 'grupo': groups.cat.categories,
+        'gap_pct_low': low,
+        'gap_pct_high': high,
+    })
+
+
+def gap_report(df, by=None, value='monthly_salary', n_boot=N_BOOT, alpha=0.05, seed=0):
+    # Tabla de brecha con su IC bootstrap al (1 - alpha)
+    table = gap_table(df, by, value)
+    ci = bootstrap_gap(df, by, value, n_boot=n_boot, alpha=alpha, seed=seed)
+    key = by or 'grupo'
+    # Las claves categóricas pueden diferir en categorías; se une por su valor
+    table[key] = table[key].astype(object)
+    ci[key] = ci[key].astype(object)
+    return table.merge(ci, on=key, how='left')
@@ -0,0 +1,99 @@
+# Carga y caché del CSV de brecha salarial de Colombia, con el mismo patrón que
+# brfss.data: esquema explícito, caché Feather con clave en el hash del CSV y
+# dataset compartido por todas las sesiones del proceso.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from brfss.data import PARSER_ENGINE, ROOT_DIR, file_fingerprint, load_cached_frame
+from brfss.metrics import RSSSampler
+
+SALARY_CSV_PATH = os.path.join(ROOT_DIR, "colombia_salary_gap_analysis(in).csv")
+
+# Enteros y booleanos anulables: una celda vacía en los extractos de RR. HH. queda
+# como <NA> en lugar de hacer fallar la lectura
+SALARY_SCHEMA = {
+    'gender': 'category',
+    'monthly_salary': 'Int64',
+    'years_of_experience': 'Int8',
+    'department': 'category',
+    'has_sons': 'boolean',
+    'education_level': 'category',
+    'total_compensation': 'Int64',
+    'job_level': 'Int8',
+    'age': 'Int8',
+    'promotion_history': 'Int8',
+}
+SALARY_COLUMNS = ['monthly_salary', 'total_compensation']
+EDUCATION_ORDER = ['High School', 'Bachelor', 'Master', 'PhD']
+
+SALARY_SCHEMA_TAG = hashlib.blake2b(
+    json.dumps(SALARY_SCHEMA, sort_keys=True).encode(), digest_size=4
+).hexdigest()
+
+_DATASETS = {}
+_DATASETS_LOCK = threading.Lock()
+
+
+def read_salary_csv(file_path, engine=PARSER_ENGINE):
+    with RSSSampler() as rss:
+        t0 = time.perf_counter()
+        header = pd.read_csv(file_path, nrows=0).columns
+        usecols = [c for c in header if c in SALARY_SCHEMA]
+        df = pd.read_csv(
+            file_path,
+            usecols=usecols,
+            dtype={c: SALARY_SCHEMA[c] for c in usecols},
+            engine=engine,
+        )
+        seconds = time.perf_counter() - t0
+
+    # Los niveles educativos conocidos se ordenan de menor a mayor para tablas y gráficos
+    if 'education_level' in df.columns:
+        levels = df['education_level'].cat.categories
+        ordered = [c for c in EDUCATION_ORDER if c in levels] + sorted(c for c in levels if c not in EDUCATION_ORDER)
+        df['education_level'] = df['education_level'].cat.reorder_categories(ordered)
+
+    stats = {
+        "engine": engine,
+        "rows": len(df),
+        "seconds": seconds,
+        "peak_mb": rss.peak_delta / 1e6,
+    }
+    return df, stats
+
+
+def load_cached_salary(file_path):
+    # Caché Feather del frame tipado, con el mismo mecanismo que el CSV del BRFSS
+    return load_cached_frame(file_path, read_salary_csv, prefix="salary", schema_tag=SALARY_SCHEMA_TAG)
+
+
+def build_salary_dataset(file_path=SALARY_CSV_PATH):
+    df, stats = load_cached_salary(file_path)
+    return {
+        'version': file_fingerprint(file_path)['hash'],
+        'df': df,
+        'stats': stats,
+    }
+
+
+def load_salary_dataset(file_path=SALARY_CSV_PATH):
+    # Caché de proceso, igual que brfss.load_dataset
+    key = os.path.abspath(file_path)
+    dataset = _DATASETS.get(key)
+    if dataset is None:
+        with _DATASETS_LOCK:
+            dataset = _DATASETS.get(key)
+            if dataset is None:
+                dataset = _DATASETS[key] = build_salary_dataset(file_path)
+    return dataset
+
+
+def clear_salary_cache():
+    with _DATASETS_LOCK:
+        _DATASETS.clear()
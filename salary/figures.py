@@ -0,0 +1,42 @@
+# Figuras Plotly del informe de brecha salarial (sin dependencia de Streamlit).
+
+import plotly.express as px
+
+
+def build_fig_gap(df_gap, by, label):
+    # Brecha relativa por grupo con su IC bootstrap como barras de error
+    df_gap = df_gap.assign(
+        ci_plus=df_gap['gap_pct_high'] - df_gap['gap_pct'],
+        ci_minus=df_gap['gap_pct'] - df_gap['gap_pct_low'],
+        **{by: df_gap[by].astype(str)},
+    )
+    fig = px.bar(
+        df_gap,
+        x=by,
+        y='gap_pct',
+        error_y='ci_plus',
+        error_y_minus='ci_minus',
+        color='gap_pct',
+        color_continuous_scale="RdBu_r",
+        color_continuous_midpoint=0,
+        labels={by: label, 'gap_pct': 'Brecha (%)', 'ci_plus': 'IC 95 % (+)', 'ci_minus': 'IC 95 % (−)'}
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def build_fig_means(df_gap, by, label):
+    # Salario medio de mujeres y hombres por grupo
+    df_means = df_gap.melt(
+        id_vars=[by], value_vars=['female_mean', 'male_mean'], var_name='Sexo', value_name='Media'
+    ).replace({'Sexo': {'female_mean': 'Female', 'male_mean': 'Male'}})
+    df_means[by] = df_means[by].astype(str)
+    return px.bar(
+        df_means,
+        x=by,
+        y='Media',
+        color='Sexo',
+        barmode='group',
+        color_discrete_map={'Female': '#EC4899', 'Male': '#1E40AF'},
+        labels={by: label, 'Media': 'Salario medio (COP)'}
+    )
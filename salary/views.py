@@ -0,0 +1,23 @@
+# Informe de brecha por dimensión memorizado en una caché LRU de proceso, con la
+# misma clave por versión del dataset que brfss.views.
+
+from brfss.cache import LRUCache
+from brfss.metrics import span
+from salary.analytics import GAP_DIMENSIONS, gap_report
+
+GAP_CACHE = LRUCache(max_entries=128)
+
+
+def gap_views(dataset, value, n_boot):
+    # Brecha global y por cada dimensión para una variable salarial y un número de réplicas
+    key = (dataset['version'], value, n_boot)
+
+    def compute():
+        views = {}
+        for by in [None] + list(GAP_DIMENSIONS):
+            with span(f"salary.gap.{by or 'total'}"):
+                views[by or 'total'] = gap_report(dataset['df'], by, value, n_boot=n_boot)
+        return views
+
+    with span("cache.salary_gap"):
+        return GAP_CACHE.get_or_compute(key, compute)